@@ -3,8 +3,194 @@ Recreate Axelrods tournament
 
 
 """
+import array
+import collections
+import copy
+import hashlib
 import itertools
+import json
+import math
+import multiprocessing
+import os
 import random
+import time
+
+import numpy
+
+MOVES = 'CD'
+PAYOFFS = ((2, 5), (0, 4))
+
+
+def encode(history):
+    """
+    Encodes a history of moves as an array of integers (the index of each
+    move in MOVES: 0 for 'C' and 1 for 'D'):
+
+        >>> encode(['C', 'D', 'D', 'C'])
+        array([0, 1, 1, 0], dtype=int8)
+        >>> encode([])
+        array([], dtype=int8)
+    """
+    if isinstance(history, History):
+        return history.array()
+    return (numpy.array(list(history), dtype='S1') == b'D').astype(numpy.int8)
+
+
+def seeds(seed, repetitions, matches):
+    """
+    Gives every repetition of a tournament its own random stream (seeded from
+    a master stream) and draws from it a seed for each of its matches:
+
+        >>> match_seeds = seeds(1, repetitions=2, matches=3)
+        >>> len(match_seeds), len(match_seeds[0])
+        (2, 3)
+
+    The seeds of a repetition do not depend on how many repetitions there
+    are:
+
+        >>> seeds(1, repetitions=5, matches=3)[:2] == match_seeds
+        True
+    """
+    return list(iter_seeds(seed, repetitions, matches))
+
+
+def iter_seeds(seed, repetitions, matches):
+    """
+    Yields the seeds of the matches of every repetition (see seeds) one
+    repetition at a time:
+
+        >>> list(iter_seeds(1, repetitions=2, matches=3)) == seeds(1, repetitions=2, matches=3)
+        True
+    """
+    master = random.Random(seed)
+    for repetition in range(repetitions):
+        stream = random.Random(master.getrandbits(32))
+        yield [stream.getrandbits(32) for match in range(matches)]
+
+
+def normal_quantile(p):
+    """
+    The p quantile of the standard normal distribution (found by bisection
+    on math.erf):
+
+        >>> round(normal_quantile(0.975), 4), round(normal_quantile(0.995), 4)
+        (1.96, 2.5758)
+    """
+    low, high = -40.0, 40.0
+    for step in range(100):
+        middle = (low + high) / 2
+        if (1 + math.erf(middle / math.sqrt(2))) / 2 < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def student_quantile(p, freedom):
+    """
+    The p quantile of Student's t distribution with a number of degrees of
+    freedom (found by bisection on its distribution function, a finite sum
+    for a whole number of degrees of freedom):
+
+        >>> round(student_quantile(0.975, 1), 3), round(student_quantile(0.975, 4), 3)
+        (12.706, 2.776)
+
+    The sum has a term for every two degrees of freedom, so above 200 the
+    quantile is found from the normal one by the Cornish Fisher expansion
+    (Abramowitz and Stegun 26.7.5), which is then exact to 7 digits:
+
+        >>> round(student_quantile(0.975, 1000), 3), round(student_quantile(0.025, 1000), 3)
+        (1.962, -1.962)
+    """
+    if freedom > 200:
+        z = normal_quantile(p)
+        terms = [(z ** 3 + z) / 4,
+                 (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96,
+                 (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384,
+                 (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160]
+        return z + sum(term / float(freedom) ** power for power, term in enumerate(terms, 1))
+    low, high = -1e6, 1e6
+    for step in range(100):
+        middle = (low + high) / 2
+        if _student_cdf(middle, freedom) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def _student_cdf(t, freedom):
+    """
+    The distribution function of Student's t distribution (Abramowitz and
+    Stegun 26.7.3 and 26.7.4):
+
+        >>> _student_cdf(0, 3), round(_student_cdf(1, 1), 4), round(_student_cdf(-2, 2), 4)
+        (0.5, 0.75, 0.0918)
+    """
+    theta = math.atan(abs(t) / math.sqrt(freedom))
+    cosine = math.cos(theta) ** 2
+    term = total = 1.0
+    if freedom % 2:
+        for k in range(3, freedom - 1, 2):
+            term *= cosine * (k - 1) / k
+            total += term
+        inside = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if freedom > 1 else 0))
+    else:
+        for k in range(2, freedom - 1, 2):
+            term *= cosine * (k - 1) / k
+            total += term
+        inside = math.sin(theta) * total
+    return (1 + inside) / 2 if t >= 0 else (1 - inside) / 2
+
+
+def _power_sum(matrix, power):
+    """
+    Returns the sum of the powers of a matrix from 0 to power - 1 (with a
+    number of products logarithmic in power):
+
+        >>> _power_sum(numpy.array([[0, 1], [1, 0]]), 3)
+        array([[2, 1],
+               [1, 2]])
+    """
+    if power == 0:
+        return numpy.zeros_like(matrix)
+    if power % 2:
+        return numpy.eye(len(matrix), dtype=matrix.dtype) + matrix.dot(_power_sum(matrix, power - 1))
+    half = _power_sum(matrix, power // 2)
+    return half + half.dot(numpy.linalg.matrix_power(matrix, power // 2))
+
+
+def _play_match(arguments):
+    """
+    Plays a single seeded match: this is the task sent to the worker
+    processes of a parallel round robin.
+
+        >>> _play_match((PAYOFFS, Defector(), Cooperator(), 10, 1, 0, False, True))
+        (0, 50, 0, 10)
+    """
+    payoffs, p1, p2, turns, seed, noise, digest, keep_history = arguments
+    scores = Axelrod(payoffs=payoffs).play_match(p1, p2, turns, seed=seed, cooperations=True, noise=noise,
+                                                 keep_history=keep_history)
+    if digest:
+        scores += (match_digest(p1, p2),)
+    return scores
+
+
+def match_digest(p1, p2):
+    """
+    A digest of the histories of both players in a match (to check that two
+    matches were identical without keeping their histories):
+
+        >>> P1, P2 = Player(), Player()
+        >>> P1.history, P2.history = ['C', 'D'], ['D', 'D']
+        >>> match_digest(P1, P2)
+        'b948cf27b9c185bdbb00df495bf20745163fe5e9'
+    """
+    digest = hashlib.sha1()
+    digest.update(p1.history.array().tobytes())
+    digest.update(p2.history.array().tobytes())
+    return digest.hexdigest()
+
 
 class Axelrod:
     """
@@ -21,7 +207,7 @@ class Axelrod:
         Defector 0
         Cooperator 50
     """
-    def __init__(self, *args):
+    def __init__(self, *args, **kwargs):
         """
         Initiate a tournament of players:
 
@@ -31,10 +217,63 @@ class Axelrod:
             >>> axelrod = Axelrod(P1, P2, P3)
             >>> axelrod.players
             [Defector, Defector, Defector]
+
+        The payoff matrix gives the score of a player (row) against the play
+        of the opponent (column), it defaults to PAYOFFS:
+
+            >>> axelrod.payoffs
+            array([[2, 5],
+                   [0, 4]])
+
+        But a different one can be used for a given tournament:
+
+            >>> axelrod = Axelrod(P1, P2, payoffs=((1, 3), (0, 2)))
+            >>> axelrod.payoffs
+            array([[1, 3],
+                   [0, 2]])
+            >>> axelrod = Axelrod(P1, P2, payoffs=(1, 3, 0, 2))
+            Traceback (most recent call last):
+            ...
+            ValueError: The payoff matrix must be 2 by 2
+
+        A Profile can be given to record where the time of the matches goes:
+
+            >>> axelrod = Axelrod(P1, P2, profile=Profile())
+            >>> isinstance(axelrod.profile, Profile)
+            True
+
+        And a MatchCache to reuse the matches of earlier tournaments:
+
+            >>> import tempfile
+            >>> axelrod = Axelrod(P1, P2, cache=MatchCache(tempfile.mkdtemp()))
+            >>> isinstance(axelrod.cache, MatchCache)
+            True
+
+        With bounded_histories=True the matches of round robins and
+        tournaments only keep the last moves of the players when they can
+        (see Axelrod.play_match with keep_history=False) so that long matches
+        do not fill the memory. The histories are then incomplete, so by
+        default they are kept whole:
+
+            >>> random.seed(1)
+            >>> axelrod = Axelrod(Random(), TitForTat(), bounded_histories=True)
+            >>> axelrod.round_robin(turns=1000)
+            >>> len(axelrod.players[0].history), axelrod.players[0].history
+            (1000, ['D'])
+            >>> axelrod = Axelrod(Random(), TitForTat())
+            >>> axelrod.round_robin(turns=1000)
+            >>> len(axelrod.players[0].history), len(list(axelrod.players[0].history))
+            (1000, 1000)
         """
         self.players = list(args)
-
-    def round_robin(self, turns=200):
+        self.payoffs = numpy.array(kwargs.get('payoffs', PAYOFFS))
+        if self.payoffs.shape != (2, 2):
+            raise ValueError('The payoff matrix must be 2 by 2')
+        self.profile = kwargs.get('profile')
+        self.cache = kwargs.get('cache')
+        self.bounded_histories = kwargs.get('bounded_histories', False)
+
+    def round_robin(self, turns=200, processes=None, noise=0):
         """
         Plays a round robin where each match lasts turns.
 
@@ -102,158 +341,2633 @@ class Axelrod:
             Grudger 1601
             Cooperator 1800
 
-        We see that Tit for Tat is much closer. Let us add in another strategy.
+        We see that Tit for Tat is much closer. Let us add in another strategy.
+
+            >>> P1 = Defector()
+            >>> P2 = Cooperator()
+            >>> P3 = TitForTat()
+            >>> P4 = Grudger()
+            >>> P5 = GoByMajority()
+            >>> axelrod = Axelrod(P1, P2, P3, P4, P5)
+            >>> axelrod.round_robin(turns=200)
+            >>> for player in sorted(axelrod.players, key=lambda x: x.score):
+            ...     print player, player.score
+            Tit For Tat 2001
+            Grudger 2001
+            Go By Majority 2001
+            Cooperator 2200
+            Defector 2388
+
+        Now Tit for Tat is top of the pile and in fact the defector is at the bottom.
+        Take a look at the various strategies.
+
+        The matches can be shared between a number of worker processes. Each
+        match is then seeded from the random module so that the scores only
+        depend on the seed and not on the number of processes:
+
+            >>> random.seed(3)
+            >>> P1 = Defector()
+            >>> P2 = Random()
+            >>> P3 = TitForTat()
+            >>> axelrod = Axelrod(P1, P2, P3)
+            >>> axelrod.round_robin(turns=100, processes=2)
+            >>> [player.score for player in axelrod.players]
+            [604, 726, 684]
+
+            >>> random.seed(3)
+            >>> axelrod = Axelrod(Defector(), Random(), TitForTat())
+            >>> axelrod.round_robin(turns=100, processes=1)
+            >>> [player.score for player in axelrod.players]
+            [604, 726, 684]
+
+        Note that the matches are played on copies of the players so their
+        histories are not kept in this case.
+
+        Every move can be flipped with a probability given by noise (see
+        Axelrod.play_match):
+
+            >>> random.seed(1)
+            >>> axelrod = Axelrod(Cooperator(), TitForTat())
+            >>> axelrod.round_robin(turns=100, noise=0.05)
+            >>> [player.score for player in axelrod.players]
+            [216, 196]
+        """
+        pairs = list(itertools.combinations(range(len(self.players)), 2))
+        stochastic = [bool(noise) or self.players[i].stochastic or self.players[j].stochastic for i, j in pairs]
+        copies = self.group_pairs(pairs, stochastic)
+        distinct = [(self.players[i], self.players[j]) for i, j in pairs if (i, j) not in copies]
+        if processes is None:
+            matches = [(p1, p2, turns, None) for p1, p2 in distinct]
+        else:
+            matches = [(p1, p2, turns, random.getrandbits(32)) for p1, p2 in distinct]
+        scores = self.play_matches(matches, processes=processes, noise=noise, histories=processes is None)
+        scores = dict(zip([pair for pair in pairs if pair not in copies], scores))
+        for pair, (original, swapped) in copies.items():
+            scores[pair] = scores[original][::-1] if swapped else scores[original]
+        for i, j in pairs:
+            self.players[i].score += scores[(i, j)][0]
+            self.players[j].score += scores[(i, j)][1]
+
+    def group_pairs(self, pairs, stochastic):
+        """
+        Finds the matches (between pairs of players given by their indices)
+        that are bound to be identical to another: the deterministic matches
+        between players with the same signatures (see Player.signature), in
+        the same or in the swapped order. Returns the pairs that need not be
+        played, each with the pair it copies and whether it is swapped:
+
+            >>> axelrod = Axelrod(Defector(), TitForTat(), Defector(), TitForTat())
+            >>> pairs = list(itertools.combinations(range(4), 2))
+            >>> copies = axelrod.group_pairs(pairs, [False] * len(pairs))
+            >>> sorted(copies.items())
+            [((0, 3), ((0, 1), False)), ((1, 2), ((0, 1), True)), ((2, 3), ((0, 1), False))]
+
+        So a tournament of 20 Defectors and 20 players of Tit For Tat only
+        plays 3 distinct matches rather than 780:
+
+            >>> axelrod = Axelrod(*[Defector() for i in range(20)] + [TitForTat() for i in range(20)])
+            >>> pairs = list(itertools.combinations(range(40), 2))
+            >>> len(pairs) - len(axelrod.group_pairs(pairs, [False] * len(pairs)))
+            3
+        """
+        signatures = [player.signature() for player in self.players]
+        originals = {}
+        copies = {}
+        for (i, j), random_match in zip(pairs, stochastic):
+            if random_match:
+                continue
+            signature = (signatures[i], signatures[j])
+            if signature in originals:
+                copies[(i, j)] = (originals[signature], False)
+            elif signature[::-1] in originals:
+                copies[(i, j)] = (originals[signature[::-1]], True)
+            else:
+                originals[signature] = (i, j)
+        return copies
+
+    def play_match(self, p1, p2, turns, seed=None, cooperations=False, noise=0, keep_history=True):
+        """
+        Plays a match between two players (starting them both afresh) and
+        returns their scores:
+
+            >>> axelrod = Axelrod()
+            >>> axelrod.play_match(Defector(), TitForTat(), turns=10)
+            (36, 41)
+
+        A seed can be given for the random module:
+
+            >>> axelrod.play_match(Random(), Random(), turns=10, seed=2)
+            (26, 36)
+
+        With cooperations=True the numbers of cooperations of both players
+        follow the scores:
+
+            >>> axelrod.play_match(Defector(), TitForTat(), turns=10, cooperations=True)
+            (36, 41, 0, 1)
+
+        When both players can be written as state machines (see
+        Player.state_machine) the match is played by
+        Axelrod.play_state_machines, otherwise turn by turn with Player.play.
+        In both cases, when both players declare a bounded state (see
+        Player.match_state) the match stops as soon as the pair of states
+        repeats: from then on the match cycles and the remaining score is
+        calculated from the cycle. The cycle is then repeated in the
+        histories (see History.repeat), which are as long as the match:
+
+            >>> P1, P2 = Defector(), TitForTat()
+            >>> axelrod.play_match(P1, P2, turns=10 ** 6, cooperations=True)
+            (3999996, 4000001, 0, 1)
+            >>> len(P2.history), P2.history[:4], axelrod.calculate_scores(P1, P2)
+            (1000000, ['C', 'D', 'D', 'D'], (3999996, 4000001))
+
+        With keep_history=False they only keep the turns played, as the last
+        moves of the match, and cannot be scored again (see History):
+
+            >>> axelrod.play_match(P1, P2, turns=10 ** 6, keep_history=False)
+            (3999996, 4000001)
+            >>> P2.history, len(P2.history), P2.history.cooperations()
+            (['D', 'D'], 1000000, 1)
+
+        With noise every move is flipped with that probability. The flips of
+        the whole match are drawn at once (from a NumPy random state seeded
+        with seed or, if there is none, from the random module) and the
+        players see the flipped moves:
+
+            >>> P1, P2 = Cooperator(), TitForTat()
+            >>> axelrod.play_match(P1, P2, turns=10, seed=4, noise=0.2)
+            (27, 17)
+            >>> P1.history, P2.history
+            (['C', 'C', 'C', 'C', 'C', 'C', 'C', 'D', 'C', 'C'], ['C', 'D', 'C', 'C', 'D', 'C', 'D', 'C', 'C', 'C'])
+
+        A state machine only follows the moves of the opponent, not its own
+        flipped moves, so noisy matches are always played turn by turn. A
+        strategy that depends on its own last move (win stay, lose shift)
+        plays as it would without state machines:
+
+            >>> P1, P2 = MemoryOne((1, 0, 0, 1)), TitForTat()
+            >>> scores = axelrod.play_match(P1, P2, turns=50, seed=1, noise=0.1)
+            >>> draws = numpy.random.RandomState(1).random_sample((2, 50)) < 0.1
+            >>> Q1, Q2 = MemoryOne((1, 0, 0, 1)), TitForTat()
+            >>> axelrod.play_turns(Q1, Q2, turns=50, flips=(draws[0].tolist(), draws[1].tolist()))
+            >>> scores == axelrod.calculate_scores(Q1, Q2), scores
+            (True, (154, 144))
+
+        With keep_history=False, a match between players that both declare
+        how many of the last moves they need (see Player.memory_depth) is
+        played turn by turn keeping only those moves (see History) and the
+        numbers of every outcome (see Axelrod.play_bounded), so its memory
+        does not grow with the number of turns. Only a match between two
+        bounded state machines (see StateMachine), which is bound to cycle,
+        is still played by its machines:
+
+            >>> P1, P2 = Random(), TitForTat()
+            >>> axelrod.play_match(P1, P2, turns=10 ** 5, seed=1, keep_history=False)
+            (274792, 274797)
+            >>> P1.history, P2.history
+            (['D'], ['C'])
+            >>> axelrod.play_match(P1, P2, turns=10 ** 5, seed=1)
+            (274792, 274797)
+            >>> len(P1.history)
+            100000
+            >>> P1, P2 = GoByMajority(), Grumpy()
+            >>> axelrod.play_match(P1, P2, turns=10 ** 5, keep_history=False)
+            (200000, 200000)
+            >>> P1.history, len(P1.history)
+            (['C'], 100000)
+
+        The state machines, states and depths of the players are only used
+        when they come with their strategies (see Player.declares), so a
+        strategy that only changes the strategy of another is played turn by
+        turn:
+
+            >>> class Opener(TitForTat):
+            ...     def strategy(self, opponent):
+            ...         return 'D' if not self.history else TitForTat.strategy(self, opponent)
+            >>> P1, P2 = Opener(), Cooperator()
+            >>> axelrod.play_match(P1, P2, turns=10)
+            (18, 23)
+            >>> P1.history
+            ['D', 'C', 'C', 'C', 'C', 'C', 'C', 'C', 'C', 'C']
+        """
+        start = time.time()
+        flips = None
+        if noise:
+            noise_seed = seed if seed is not None else random.getrandbits(32)
+            draws = numpy.random.RandomState(noise_seed).random_sample((2, turns)) < noise
+            flips = bytearray(draws[0].tobytes()), bytearray(draws[1].tobytes())
+        if seed is not None:
+            random.seed(seed)
+        p1.reset()
+        p2.reset()
+        machines = (None, None)
+        if not (noise or p1.stochastic or p2.stochastic):
+            machines = tuple(player.state_machine(turns) if player.declares('state_machine')
+                             else Player.state_machine(player, turns) for player in (p1, p2))
+        bounded = None not in machines and machines[0].bounded and machines[1].bounded
+        depths = [player.memory_depth if player.declares('memory_depth') else None for player in (p1, p2)]
+        depth = None
+        if not (keep_history or bounded) and None not in depths:
+            depth = max(depths)
+            machines = (None, None)
+        for player in (p1, p2):
+            if player.history.depth != depth:
+                player._history = History(depth=depth)
+        outcomes = None
+        if None not in machines:
+            h1, h2, cycle = self.play_state_machines(machines[0], machines[1], turns)
+            p1.history.load(h1)
+            p2.history.load(h2)
+        else:
+            if self.profile is not None:
+                self.profile.watch((p1, p2), 'strategy')
+            try:
+                if depth is None:
+                    cycle = self.play_turns(p1, p2, turns, flips)
+                else:
+                    outcomes = self.play_bounded(p1, p2, turns, flips)
+            finally:
+                if self.profile is not None:
+                    self.profile.release((p1, p2), 'strategy')
+        if outcomes is not None:
+            totals = [(outcomes * self.payoffs).sum(), (outcomes * self.payoffs.T).sum()]
+            if cooperations:
+                totals += [outcomes[0].sum(), outcomes[:, 0].sum()]
+            if self.profile is not None:
+                self.profile.record(p1, p2, time.time() - start)
+            return tuple(int(total) for total in totals)
+        per_turn = list(self.calculate_turn_scores(p1, p2))
+        if cooperations:
+            per_turn += [1 - p1.history.array(), 1 - p2.history.array()]
+        totals = []
+        for values in per_turn:
+            total = values.sum()
+            if cycle is not None:
+                repeats, remainder = divmod(turns - len(values), len(values) - cycle)
+                total += repeats * values[cycle:].sum() + values[cycle:cycle + remainder].sum()
+            totals.append(int(total))
+        if cycle is not None:
+            p1.history.repeat(cycle, turns, keep_history)
+            p2.history.repeat(cycle, turns, keep_history)
+        if self.profile is not None:
+            self.profile.record(p1, p2, time.time() - start)
+        return tuple(totals)
+
+    def play_turns(self, p1, p2, turns, flips=None):
+        """
+        Plays the turns of a match with Player.play, stopping early if both
+        players declare a bounded state (see Player.match_state) and the pair
+        of states repeats. Returns the turn at which the cycle that follows
+        starts (None if there is no cycle). The moves of both players are
+        flipped on the turns given by flips (two sequences of 0 and 1), in
+        which case there is no cycle to find:
+
+            >>> P1, P2 = Cooperator(), TitForTat()
+            >>> Axelrod().play_turns(P1, P2, turns=10)
+            0
+            >>> P1.history, P2.history
+            (['C'], ['C'])
+            >>> P1.reset(), P2.reset()
+            (None, None)
+            >>> Axelrod().play_turns(P1, P2, turns=3, flips=([0, 1, 0], [0, 0, 0]))
+            >>> P1.history, P2.history
+            (['C', 'D', 'C'], ['C', 'C', 'D'])
+        """
+        if flips is not None:
+            for turn in range(turns):
+                p1.play(p2, (flips[0][turn], flips[1][turn]))
+            return None
+        seen = {} if p1.declares('match_state') and p2.declares('match_state') else None
+        for turn in range(turns):
+            if seen is not None:
+                state = (p1.match_state(p2), p2.match_state(p1))
+                if None in state:
+                    seen = None
+                elif state in seen:
+                    return seen[state]
+                else:
+                    seen[state] = turn
+            p1.play(p2)
+        return None
+
+    def play_bounded(self, p1, p2, turns, flips=None):
+        """
+        Plays the turns of a match with Player.play (flipping moves as
+        Axelrod.play_turns does) and counts the outcomes rather than relying
+        on the histories: returns the number of turns with every pair of
+        moves (the move of p1 giving the row):
+
+            >>> P1, P2 = Defector(), TitForTat()
+            >>> Axelrod().play_bounded(P1, P2, turns=5)
+            array([[0, 0],
+                   [1, 4]])
+        """
+        outcomes = [0, 0, 0, 0]
+        h1, h2 = p1.history, p2.history
+        if flips is None:
+            for turn in itertools.repeat(None, turns):
+                p1.play(p2)
+                outcomes[2 * (h1.last() == 'D') + (h2.last() == 'D')] += 1
+        else:
+            for turn in range(turns):
+                p1.play(p2, (flips[0][turn], flips[1][turn]))
+                outcomes[2 * (h1.last() == 'D') + (h2.last() == 'D')] += 1
+        return numpy.array(outcomes).reshape(2, 2)
+
+    def play_state_machines(self, m1, m2, turns):
+        """
+        Plays a match between two state machines (see StateMachine) by
+        indexing their tables. Returns the encoded moves of both players (see
+        MOVES) until the pair of states repeats, along with the turn at which
+        the cycle that follows starts (None if the match ended before). The
+        states are only followed when both machines are bounded (see
+        StateMachine), as the others never repeat their states:
+
+            >>> axelrod = Axelrod()
+            >>> m1, m2 = Grudger().state_machine(10), Defector().state_machine(10)
+            >>> h1, h2, cycle = axelrod.play_state_machines(m1, m2, turns=10)
+            >>> list(h1), list(h2), cycle
+            ([0, 1], [1, 1], 1)
+            >>> m1, m2 = GoByMajority().state_machine(3), Defector().state_machine(3)
+            >>> h1, h2, cycle = axelrod.play_state_machines(m1, m2, turns=3)
+            >>> list(h1), list(h2), cycle
+            ([0, 1, 1], [1, 1, 1], None)
+        """
+        moves1, transitions1 = m1.moves, m1.transitions
+        moves2, transitions2 = m2.moves, m2.transitions
+        s1, s2 = m1.initial, m2.initial
+        h1, h2 = bytearray(), bytearray()
+        seen = {} if m1.bounded and m2.bounded else None
+        for turn in itertools.islice(itertools.count(), turns):
+            if seen is not None:
+                if (s1, s2) in seen:
+                    return h1, h2, seen[(s1, s2)]
+                seen[(s1, s2)] = turn
+            a, b = moves1[s1], moves2[s2]
+            h1.append(a)
+            h2.append(b)
+            s1, s2 = transitions1[b][s1], transitions2[a][s2]
+        return h1, h2, None
+
+    def play_matches(self, matches, processes=None, noise=0, histories=False):
+        """
+        Plays a list of seeded matches given as (p1, p2, turns, seed) and
+        returns the list of their scores. With a number of processes the
+        matches are shared between a pool of workers (playing copies of the
+        players). With histories=True every match is played (see
+        Axelrod.iter_matches) so that the players keep its histories:
+
+            >>> axelrod = Axelrod()
+            >>> matches = [(Defector(), Cooperator(), 10, 1), (Random(), Random(), 10, 2)]
+            >>> axelrod.play_matches(matches)
+            [(0, 50), (26, 36)]
+            >>> axelrod.play_matches(matches, processes=2)
+            [(0, 50), (26, 36)]
+        """
+        return [result[:2] for result in self.iter_matches(matches, processes=processes, noise=noise,
+                                                           histories=histories)]
+
+    def iter_matches(self, matches, processes=None, digests=False, noise=0, pool=None, histories=False):
+        """
+        Plays a list of seeded matches like Axelrod.play_matches but yields
+        the scores and numbers of cooperations of every match (in order) as
+        soon as it is played. With digests=True the digest of the histories
+        (see match_digest) follows:
+
+            >>> axelrod = Axelrod()
+            >>> matches = [(Defector(), Cooperator(), 3, 1)]
+            >>> for scores in axelrod.iter_matches(matches, digests=True):
+            ...     print scores
+            (0, 15, 0, 3, 'da1b94254687da94847ad07fed00f9ab750c6c7f')
+
+        With a MatchCache (see Axelrod.__init__) the matches found in it are
+        not played and the others are added to it, unless digests or
+        histories=True are asked for: both need the histories of the
+        matches, which the cache does not keep.
+
+        A pool of processes workers can be given to be used (and left
+        running) rather than a new one.
+        """
+        if self.cache is None or digests or histories:
+            for scores in self.play_iter(matches, processes, digests, noise, pool):
+                yield scores
+            return
+        keys = [self.cache.key(p1, p2, turns, seed, noise, self.payoffs) for p1, p2, turns, seed in matches]
+        found = [self.cache.get(key) for key in keys]
+        missing = [match for match, scores in zip(matches, found) if scores is None]
+        played = self.play_iter(missing, processes, digests, noise, pool)
+        for key, scores in zip(keys, found):
+            if scores is None:
+                scores = next(played)
+                self.cache.put(key, scores)
+            yield scores
+
+    def play_iter(self, matches, processes=None, digests=False, noise=0, pool=None):
+        """
+        Plays seeded matches in this process or in a pool of workers (the
+        one given or a new one) and yields their results in order (see
+        Axelrod.iter_matches)
+        """
+        if processes is None or processes == 1:
+            for p1, p2, turns, seed in matches:
+                scores = self.play_match(p1, p2, turns, seed=seed, cooperations=True, noise=noise,
+                                         keep_history=digests or not self.bounded_histories)
+                if digests:
+                    scores += (match_digest(p1, p2),)
+                yield scores
+            return
+        if self.profile is not None:
+            raise ValueError('A profiled tournament must be played without processes')
+        keep_history = digests or not self.bounded_histories
+        tasks = [(self.payoffs,) + tuple(match) + (noise, digests, keep_history) for match in matches]
+        own_pool = pool is None
+        if own_pool:
+            pool = multiprocessing.Pool(processes)
+        try:
+            for scores in pool.imap(_play_match, tasks, max(1, len(tasks) // (4 * processes))):
+                yield scores
+        finally:
+            if own_pool:
+                pool.terminate()
+                pool.join()
+
+    def play_batch(self, p1, p2, turns, copies, seed=None, cooperations=False, noise=0):
+        """
+        Plays a number of independent copies of a match side by side: every
+        turn the moves of all the copies are computed at once by the
+        batch_strategy methods of the players (using a NumPy random state
+        seeded with seed). Returns the arrays of scores of both players
+        (followed by their numbers of cooperations if cooperations=True):
+
+            >>> axelrod = Axelrod()
+            >>> axelrod.play_batch(Defector(), TitForTat(), turns=10, copies=3)
+            (array([36, 36, 36]), array([41, 41, 41]))
+            >>> axelrod.play_batch(Random(), TitForTat(), turns=10, copies=3, seed=1)
+            (array([25, 24, 29]), array([25, 29, 29]))
+            >>> axelrod.play_batch(Defector(), TitForTat(), turns=10, copies=2, cooperations=True)
+            (array([36, 36]), array([41, 41]), array([0, 0]), array([1, 1]))
+
+        With noise the moves of all the copies are flipped with that
+        probability:
+
+            >>> axelrod.play_batch(Cooperator(), TitForTat(), turns=10, copies=3, seed=1, noise=0.2)
+            (array([23, 21, 32]), array([23, 26, 27]))
+        """
+        start = time.time()
+        random_state = numpy.random.RandomState(seed)
+        h1, h2 = BatchHistory(copies, turns), BatchHistory(copies, turns)
+        if self.profile is not None:
+            self.profile.watch((p1, p2), 'batch_strategy')
+        try:
+            for turn in range(turns):
+                m1 = p1.batch_strategy(h1, h2, random_state)
+                m2 = p2.batch_strategy(h2, h1, random_state)
+                if noise:
+                    flips = random_state.random_sample((2, copies)) < noise
+                    m1, m2 = m1 ^ flips[0], m2 ^ flips[1]
+                h1.append(m1)
+                h2.append(m2)
+        finally:
+            if self.profile is not None:
+                self.profile.release((p1, p2), 'batch_strategy')
+                self.profile.record(p1, p2, time.time() - start, copies)
+        s1 = self.payoffs[h1.moves, h2.moves].sum(axis=1)
+        s2 = self.payoffs[h2.moves, h1.moves].sum(axis=1)
+        if cooperations:
+            return s1, s2, h1.cooperations(), h2.cooperations()
+        return s1, s2
+
+    def tournament(self, turns=200, repetitions=10, seed=None, processes=None, batched=False,
+                   checkpoint=None, digests=False, noise=0, streaming=False, block=100, confidence=None,
+                   seconds=None, shard=None):
+        """
+        Runs repetitions of the round robin (this is mainly to handle stochastic strategies).
+
+        Returns the Results of the tournament: the total score of every
+        player in every repetition along with the score and the rate of
+        cooperation of every player against every other player.
+
+            >>> random.seed(1)
+            >>> P1 = Defector()
+            >>> P2 = Cooperator()
+            >>> P3 = TitForTat()
+            >>> P4 = Grudger()
+            >>> P5 = GoByMajority()
+            >>> P6 = Random()
+            >>> axelrod = Axelrod(P1, P2, P3, P4, P5, P6)
+            >>> results = axelrod.tournament(turns=200, repetitions=10)
+            >>> type(results)
+            <class 'axelrod.Results'>
+            >>> for player in sorted(results.players):
+            ...     print player, results[player]
+            Cooperator [2906 2924 2912 2918 2921 2906 2906 2870 2888 2915]
+            Defector [2828 2784 2780 2784 2752 2776 2808 2820 2780 2812]
+            Go By Majority [2580 2555 2426 2522 2512 2643 2659 2625 2692 2631]
+            Grudger [2418 2410 2416 2418 2408 2402 2384 2366 2378 2370]
+            Random [2951 3031 3427 3245 3157 2827 2781 2929 2761 2793]
+            Tit For Tat [2560 2549 2559 2574 2540 2536 2540 2559 2554 2556]
+
+        Let us take a look at the min, mean and max of the results (remember
+        that a low score is a good score):
+
+            >>> for player, low, mean, high in zip(results.players, results.quantile(0),
+            ...                                    results.mean(), results.quantile(1)):
+            ...     print player, low, mean, high
+            Defector 2752.0 2792.4 2828.0
+            Cooperator 2870.0 2906.6 2924.0
+            Tit For Tat 2536.0 2552.7 2574.0
+            Grudger 2366.0 2397.0 2418.0
+            Go By Majority 2426.0 2584.5 2692.0
+            Random 2761.0 2990.2 3427.0
+            >>> results.ranking()
+            [Grudger, Tit For Tat, Go By Majority, Defector, Cooperator, Random]
+
+        We get a similar conclusion to before with Grudger, Defect and Tit for Tat doing very well: in other words we see that cooperation is rewarded.
+
+        Every repetition (and every match within it) has its own random stream
+        seeded from a master seed (by default drawn from the random module).
+        The repetitions can thus be run by a number of worker processes and
+        give exactly the same results:
+
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=4, seed=5)
+            >>> results.scores
+            array([[292, 272, 264, 312],
+                   [325, 334, 339, 342],
+                   [350, 359, 371, 362]])
+
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=4, seed=5, processes=3)
+            >>> results.scores
+            array([[292, 272, 264, 312],
+                   [325, 334, 339, 342],
+                   [350, 359, 371, 362]])
+
+        Matches between two deterministic strategies (see Player.stochastic)
+        always give the same result so they are only played in the first
+        repetition and their scores are reused in the others:
+
+            >>> results = Axelrod(Defector(), TitForTat()).tournament(turns=50, repetitions=3)
+            >>> results.scores
+            array([[196, 196, 196],
+                   [201, 201, 201]])
+
+        With batched=True the stochastic matches of all the repetitions are
+        played at once with Axelrod.play_batch (when both players have a
+        batch_strategy). These use NumPy's random number generator so the
+        results differ from the ones above:
+
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=4, seed=5, batched=True)
+            >>> results.scores
+            array([[304, 316, 308, 300],
+                   [336, 338, 339, 333],
+                   [358, 352, 360, 356]])
+
+        The scores of every match can be streamed to a checkpoint file as soon
+        as it is played (see Axelrod.read_checkpoint), with a digest of the
+        histories if digests=True. An interrupted tournament started again
+        with the same checkpoint only plays the matches that are missing:
+
+            >>> import os, tempfile
+            >>> checkpoint = os.path.join(tempfile.mkdtemp(), 'tournament.json')
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=2, seed=5, checkpoint=checkpoint, digests=True)
+            >>> with open(checkpoint) as f:
+            ...     print f.readlines()[1].strip()
+            {"cooperations": [0, 1], "digest": "02777fe3e6794453337befcb8df144b3e4595f62", "pair": [0, 1], "repetition": 0, "scores": [196, 201]}
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=4, checkpoint=checkpoint)
+            >>> results.scores
+            array([[292, 272, 264, 312],
+                   [325, 334, 339, 342],
+                   [350, 359, 371, 362]])
+
+        With noise every move is flipped with that probability (see
+        Axelrod.play_match) and every match is replayed in every repetition:
+
+            >>> results = Axelrod(Cooperator(), TitForTat()).tournament(turns=50, repetitions=3, seed=1, noise=0.1)
+            >>> results.scores
+            array([[118, 110, 114],
+                   [ 93, 105,  99]])
+
+        With streaming=True the scores are not kept: the repetitions are
+        played a block at a time and only folded into StreamingResults
+        (running statistics of the scores of every player and pairing), so
+        the memory does not grow with the number of repetitions. Without
+        batches the matches are the same:
+
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> streamed = Axelrod(*players).tournament(turns=50, repetitions=4, seed=5, streaming=True, block=3)
+            >>> type(streamed)
+            <class 'axelrod.StreamingResults'>
+            >>> streamed.mean()
+            array([285. , 335. , 360.5])
+            >>> Axelrod(*players).tournament(turns=50, repetitions=4, seed=5).mean()
+            array([285. , 335. , 360.5])
+            >>> Axelrod(*players).tournament(streaming=True, checkpoint=checkpoint)
+            Traceback (most recent call last):
+            ...
+            ValueError: A streamed tournament cannot be checkpointed
+
+        A streamed tournament can also stop early: after every block once
+        the ranking is stable at a confidence (see
+        StreamingResults.converged) or once it has run for a number of
+        seconds. The repetitions then only give the budget and the results
+        say how many were needed:
+
+            >>> players = [Defector(), TitForTat(), Random(), Cooperator()]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=1000, seed=2, block=10,
+            ...                                        confidence=0.95)
+            >>> results.repetitions, results.converged(0.95)
+            (10, True)
+            >>> results.ranking()
+            [Defector, Random, Tit For Tat, Cooperator]
+
+        When the mean scores are too close, the budget runs out first:
+
+            >>> players = [Defector(), TitForTat(), Random(), MemoryOne((0.9, 0.1, 0.9, 0.1))]
+            >>> results = Axelrod(*players).tournament(turns=50, repetitions=200, seed=2, block=10,
+            ...                                        confidence=0.95)
+            >>> results.repetitions, results.converged(0.95)
+            (200, False)
+
+        A tournament can be split into shards played on their own (by other
+        processes or machines sharing a filesystem): shard=(index, count)
+        only plays every count-th match from the index-th and writes it to
+        the checkpoint, returning nothing. Every shard needs the same seed
+        and the checkpoints are combined by Axelrod.merge:
+
+            >>> directory = tempfile.mkdtemp()
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> shards = [os.path.join(directory, 'shard-%s.json' % index) for index in range(3)]
+            >>> for index, shard in enumerate(shards):
+            ...     Axelrod(*players).tournament(turns=50, repetitions=4, seed=5, checkpoint=shard, shard=(index, 3))
+            >>> Axelrod(*players).merge(shards, turns=50, repetitions=4).scores
+            array([[292, 272, 264, 312],
+                   [325, 334, 339, 342],
+                   [350, 359, 371, 362]])
+            >>> Axelrod(*players).tournament(turns=50, repetitions=4, shard=(0, 3))
+            Traceback (most recent call last):
+            ...
+            ValueError: A shard needs a checkpoint and a seed
+            >>> Axelrod(*players).tournament(turns=50, repetitions=4, seed=5, checkpoint=shards[0], shard=(3, 3))
+            Traceback (most recent call last):
+            ...
+            ValueError: A shard index must be at least 0 and less than the number of shards
+        """
+        if confidence is not None or seconds is not None:
+            streaming = True
+        if streaming and checkpoint is not None:
+            raise ValueError('A streamed tournament cannot be checkpointed')
+        if shard is not None and (checkpoint is None or seed is None):
+            raise ValueError('A shard needs a checkpoint and a seed')
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError('A shard index must be at least 0 and less than the number of shards')
+        pairs, stochastic, copies = self.pairings(noise)
+        played = {}
+        if checkpoint is not None:
+            seed, played = self.read_checkpoint(checkpoint, turns, seed, noise, batched)
+        elif seed is None:
+            seed = random.getrandbits(32)
+        if streaming:
+            return self.stream_tournament(pairs, stochastic, copies, turns, repetitions, seed, processes,
+                                          batched, noise, block, confidence, seconds)
+        match_seeds = seeds(seed, repetitions, len(pairs))
+        keys = [(repetition, i, j) for repetition in range(repetitions)
+                for index, (i, j) in enumerate(pairs)
+                if (repetition == 0 or stochastic[index]) and (i, j) not in copies]
+        indices = dict((pair, index) for index, pair in enumerate(pairs))
+        batches = []
+        if batched:
+            batches = [index for index, (i, j) in enumerate(pairs) if stochastic[index]
+                       and self.players[i].declares('batch_strategy') and self.players[j].declares('batch_strategy')]
+            batched_pairs = set(batches)
+            keys = [key for key in keys if indices[key[1:]] not in batched_pairs]
+        if shard is not None:
+            keys = keys[shard[0]::shard[1]]
+            batches = [index for index in batches if index % shard[1] == shard[0]]
+        record = self._open_checkpoint(checkpoint)
+        try:
+            for index in batches:
+                i, j = pairs[index]
+                batch = [(repetition, i, j) for repetition in range(repetitions)]
+                if any(key not in played for key in batch):
+                    arrays = self.play_batch(self.players[i], self.players[j], turns, repetitions,
+                                             seed=match_seeds[0][index], cooperations=True, noise=noise)
+                    for key, result in zip(batch, zip(*arrays)):
+                        if key not in played:
+                            played[key] = tuple(int(value) for value in result)
+                            record(key, played[key])
+            keys = [key for key in keys if key not in played]
+            matches = [(self.players[i], self.players[j], turns, match_seeds[repetition][indices[(i, j)]])
+                       for repetition, i, j in keys]
+            results = self.iter_matches(matches, processes=processes, digests=digests, noise=noise)
+            for key, result in zip(keys, results):
+                played[key] = tuple(result[:4])
+                record(key, played[key], *result[4:])
+        finally:
+            record.close()
+        if shard is None:
+            return self.collect(pairs, stochastic, copies, played, turns, repetitions, noise)
+
+    def add_players(self, results, players, turns=None, seed=None, processes=None, noise=None):
+        """
+        Adds players to a tournament that has been run (with the turns and
+        noise of its results) and returns its new Results: only the matches
+        of the new players are played (for as many repetitions as the results
+        hold) and the deterministic ones that copy a match already played
+        (see Axelrod.group_pairs) are not. The scores of the players are
+        updated with the scores of the new matches:
+
+            >>> players = [Defector(), TitForTat(), Random()]
+            >>> axelrod = Axelrod(*players)
+            >>> results = axelrod.tournament(turns=50, repetitions=3, seed=1)
+            >>> results.scores
+            array([[296, 312, 312],
+                   [337, 335, 342],
+                   [356, 355, 357]])
+            >>> results = axelrod.add_players(results, [Cooperator(), Defector()], seed=1)
+            >>> results.players
+            [Defector, Tit For Tat, Random, Cooperator, Defector]
+            >>> results.scores
+            array([[496, 512, 512],
+                   [638, 636, 643],
+                   [633, 635, 641],
+                   [772, 772, 763],
+                   [496, 484, 492]])
+            >>> [player.score for player in axelrod.players]
+            [1520, 1917, 1909, 2307, 1472]
+
+        The new matches cannot be played with other turns or noise:
+
+            >>> axelrod.add_players(results, [Cooperator()], turns=10)
+            Traceback (most recent call last):
+            ...
+            ValueError: The tournament was played with 50 turns and a noise of 0, not 10 turns and a noise of 0
+
+        The new stochastic matches get their own seeds (from the seed and the
+        number of players) so they are not the ones a tournament of all the
+        players from the start would play.
+        """
+        turns = results.turns if turns is None else turns
+        noise = results.noise if noise is None else noise
+        if turns is None:
+            raise ValueError('The number of turns of the tournament must be given')
+        if results.turns not in (None, turns) or noise != results.noise:
+            raise ValueError('The tournament was played with %s turns and a noise of %s, not %s turns and a noise '
+                             'of %s' % (results.turns, results.noise, turns, noise))
+        old = len(self.players)
+        self.players.extend(players)
+        size = len(self.players)
+        repetitions = results.payoffs.shape[2]
+        payoffs = numpy.zeros((size, size, repetitions), dtype=int)
+        payoffs[:old, :old] = results.payoffs
+        cooperation = numpy.full((size, size, repetitions), numpy.nan)
+        cooperation[:old, :old] = results.cooperation
+        new_pairs = [(i, j) for i, j in itertools.combinations(range(size), 2) if j >= old]
+        pairs = list(itertools.combinations(range(old), 2)) + new_pairs
+        stochastic = [bool(noise) or self.players[i].stochastic or self.players[j].stochastic for i, j in pairs]
+        random_pair = dict(zip(pairs, stochastic))
+        copies = self.group_pairs(pairs, stochastic)
+        if seed is None:
+            seed = random.getrandbits(32)
+        match_seeds = seeds(seed * 2 ** 32 + size, repetitions, len(new_pairs))
+        keys = [(repetition, index) for repetition in range(repetitions) for index, pair in enumerate(new_pairs)
+                if (repetition == 0 or random_pair[pair]) and pair not in copies]
+        matches = [(self.players[new_pairs[index][0]], self.players[new_pairs[index][1]], turns,
+                    match_seeds[repetition][index]) for repetition, index in keys]
+        for (repetition, index), result in zip(keys, self.iter_matches(matches, processes=processes, noise=noise)):
+            i, j = new_pairs[index]
+            played = slice(repetition, repetition + 1) if random_pair[(i, j)] else slice(None)
+            payoffs[i, j, played], payoffs[j, i, played] = result[:2]
+            cooperation[i, j, played], cooperation[j, i, played] = result[2] / float(turns), result[3] / float(turns)
+        for i, j in new_pairs:
+            if (i, j) in copies:
+                (k, l), swapped = copies[(i, j)]
+                if swapped:
+                    k, l = l, k
+                payoffs[i, j], payoffs[j, i] = payoffs[k, l], payoffs[l, k]
+                cooperation[i, j], cooperation[j, i] = cooperation[k, l], cooperation[l, k]
+        for index, player in enumerate(self.players):
+            player.score += int(payoffs[index, old:].sum() if index < old else payoffs[index].sum())
+        return Results(self.players, payoffs, cooperation, turns, noise)
+
+    def remove_players(self, results, players):
+        """
+        Removes players from a tournament that has been run and returns its
+        new Results (no match is played). The scores of the remaining
+        players lose their scores against the players removed:
+
+            >>> P1, P2, P3 = Defector(), TitForTat(), Cooperator()
+            >>> axelrod = Axelrod(P1, P2, P3)
+            >>> results = axelrod.tournament(turns=10, repetitions=2)
+            >>> results = axelrod.remove_players(results, [P3])
+            >>> results.players, results.scores
+            ([Defector, Tit For Tat], array([[36, 36],
+                   [41, 41]]))
+            >>> P1.score, P2.score
+            (72, 82)
+        """
+        removed = [self.players.index(player) for player in players]
+        kept = [index for index in range(len(self.players)) if index not in removed]
+        for index in kept:
+            self.players[index].score -= int(results.payoffs[index, removed].sum())
+        self.players = [self.players[index] for index in kept]
+        grid = numpy.ix_(kept, kept)
+        return Results(self.players, results.payoffs[grid], results.cooperation[grid], results.turns, results.noise)
+
+    def self_play(self, turns=200, repetitions=1, seed=None, processes=None, noise=0):
+        """
+        Plays every player against a copy of itself (which a tournament does
+        not do) and returns the mean score of each, over both sides and the
+        repetitions. The deterministic matches are only played once:
+
+            >>> axelrod = Axelrod(Defector(), TitForTat(), Random())
+            >>> axelrod.self_play(turns=10, repetitions=4, seed=1)
+            array([40.   , 20.   , 26.875])
+
+        The players themselves are not changed:
+
+            >>> [player.score for player in axelrod.players], axelrod.players[0].history
+            ([0, 0, 0], [])
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        match_seeds = seeds(seed, repetitions, len(self.players))
+        keys = [(repetition, index) for repetition in range(repetitions)
+                for index, player in enumerate(self.players) if repetition == 0 or noise or player.stochastic]
+        matches = [(copy.deepcopy(self.players[index]), copy.deepcopy(self.players[index]), turns,
+                    match_seeds[repetition][index]) for repetition, index in keys]
+        totals = numpy.zeros(len(self.players))
+        counts = numpy.zeros(len(self.players))
+        for (repetition, index), result in zip(keys, self.iter_matches(matches, processes=processes, noise=noise)):
+            totals[index] += result[0] + result[1]
+            counts[index] += 2
+        return totals / counts
+
+    def pairings(self, noise=0):
+        """
+        Returns the pairs of players of a tournament (by their indices),
+        whether each of their matches is stochastic (with or without noise)
+        and the matches that copy another (see Axelrod.group_pairs):
+
+            >>> Axelrod(Defector(), Random(), Defector()).pairings()
+            ([(0, 1), (0, 2), (1, 2)], [True, False, True], {})
+            >>> Axelrod(Defector(), Random(), Defector()).pairings(noise=0.1)[1]
+            [True, True, True]
+        """
+        pairs = list(itertools.combinations(range(len(self.players)), 2))
+        stochastic = [bool(noise) or self.players[i].stochastic or self.players[j].stochastic for i, j in pairs]
+        return pairs, stochastic, self.group_pairs(pairs, stochastic)
+
+    def merge(self, checkpoints, turns=200, repetitions=10, noise=0, batched=False):
+        """
+        Combines the checkpoints written by the shards of a tournament (see
+        Axelrod.tournament) into the Results the whole tournament would have
+        given. The checkpoints must all come from the same tournament and
+        hold every match between them:
+
+            >>> import os, tempfile
+            >>> shard = os.path.join(tempfile.mkdtemp(), 'shard.json')
+            >>> axelrod = Axelrod(Defector(), Random(), TitForTat())
+            >>> axelrod.tournament(turns=10, repetitions=2, seed=1, checkpoint=shard, shard=(0, 2))
+            >>> axelrod.merge([shard], turns=10, repetitions=2)
+            Traceback (most recent call last):
+            ...
+            ValueError: The checkpoints are missing 2 matches
+            >>> axelrod.merge([shard + '.missing'], turns=10, repetitions=2)  # doctest: +ELLIPSIS
+            Traceback (most recent call last):
+            ...
+            ValueError: There is no checkpoint at ....missing
+        """
+        played = {}
+        seeds_read = set()
+        for checkpoint in checkpoints:
+            if not os.path.exists(checkpoint):
+                raise ValueError('There is no checkpoint at %s' % checkpoint)
+            seed, records = self.read_checkpoint(checkpoint, turns, noise=noise, batched=batched)
+            seeds_read.add(seed)
+            played.update(records)
+        if len(seeds_read) > 1:
+            raise ValueError('The checkpoints were written by different tournaments')
+        pairs, stochastic, copies = self.pairings(noise)
+        missing = [(repetition, i, j) for repetition in range(repetitions) for index, (i, j) in enumerate(pairs)
+                   if (repetition == 0 or stochastic[index]) and (i, j) not in copies
+                   and (repetition, i, j) not in played]
+        if missing:
+            raise ValueError('The checkpoints are missing %s matches' % len(missing))
+        return self.collect(pairs, stochastic, copies, played, turns, repetitions, noise)
+
+    def collect(self, pairs, stochastic, copies, played, turns, repetitions, noise=0):
+        """
+        Gathers the scores and cooperations of the matches of a tournament
+        (played, mapping (repetition, i, j) to them) into its Results,
+        filling in the matches that copy another and adding the total scores
+        to the players.
+        """
+        for (i, j), (original, swapped) in copies.items():
+            s1, s2, c1, c2 = played[(0,) + original]
+            played[(0, i, j)] = (s2, s1, c2, c1) if swapped else (s1, s2, c1, c2)
+        size = len(self.players)
+        payoffs = numpy.zeros((size, size, repetitions), dtype=int)
+        cooperation = numpy.full((size, size, repetitions), numpy.nan)
+        for index, (i, j) in enumerate(pairs):
+            if stochastic[index]:
+                values = numpy.array([played[(repetition, i, j)] for repetition in range(repetitions)])
+            else:
+                values = numpy.array([played[(0, i, j)]])
+            payoffs[i, j], payoffs[j, i] = values[:, 0], values[:, 1]
+            cooperation[i, j], cooperation[j, i] = values[:, 2] / float(turns), values[:, 3] / float(turns)
+        results = Results(self.players, payoffs, cooperation, turns, noise)
+        for player, score in zip(self.players, results.scores.sum(axis=1)):
+            player.score += int(score)
+        return results
+
+    def stream_tournament(self, pairs, stochastic, copies, turns, repetitions, seed, processes, batched, noise,
+                          block, confidence=None, seconds=None):
+        """
+        Plays the repetitions of a tournament a block at a time (see
+        Axelrod.tournament with streaming=True) and returns its
+        StreamingResults. The deterministic matches are played once, the
+        others in every repetition (in batches of a block of copies if
+        batched=True) with the same seeds as a tournament that keeps its
+        scores. It stops after a block once the results have converged at
+        the confidence or after the seconds have run out (if given). All the
+        blocks share a single pool of processes workers.
+        """
+        pool = None
+        if processes is not None and processes != 1:
+            pool = multiprocessing.Pool(processes)
+        try:
+            return self._stream_blocks(pairs, stochastic, copies, turns, repetitions, seed, processes, batched,
+                                       noise, block, confidence, seconds, pool)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def _stream_blocks(self, pairs, stochastic, copies, turns, repetitions, seed, processes, batched, noise,
+                       block, confidence, seconds, pool):
+        """
+        Plays the blocks of a streamed tournament (see
+        Axelrod.stream_tournament) on the pool
+        """
+        started = time.time()
+        size = len(self.players)
+        results = StreamingResults(self.players, seed=seed)
+        fixed = numpy.zeros((size, size), dtype=int)
+        random_pairs = [(index, pair) for index, pair in enumerate(pairs) if stochastic[index]]
+        match_seeds = iter_seeds(seed, repetitions, len(pairs))
+        for start in range(0, repetitions, block):
+            count = min(block, repetitions - start)
+            block_seeds = [next(match_seeds) for repetition in range(count)]
+            if start == 0:
+                keys = [index for index, pair in enumerate(pairs) if not stochastic[index] and pair not in copies]
+                matches = [(self.players[pairs[index][0]], self.players[pairs[index][1]], turns,
+                            block_seeds[0][index]) for index in keys]
+                for index, result in zip(keys, self.iter_matches(matches, processes=processes, pool=pool)):
+                    i, j = pairs[index]
+                    fixed[i, j], fixed[j, i] = result[:2]
+                for (i, j), (original, swapped) in copies.items():
+                    s1, s2 = fixed[original], fixed[original[::-1]]
+                    fixed[i, j], fixed[j, i] = (s2, s1) if swapped else (s1, s2)
+            payoffs = numpy.repeat(fixed[:, :, numpy.newaxis], count, axis=2)
+            keys = []
+            for index, (i, j) in random_pairs:
+                p1, p2 = self.players[i], self.players[j]
+                if batched and p1.declares('batch_strategy') and p2.declares('batch_strategy'):
+                    payoffs[i, j], payoffs[j, i] = self.play_batch(p1, p2, turns, count, seed=block_seeds[0][index],
+                                                                   noise=noise)
+                else:
+                    keys.extend((repetition, index) for repetition in range(count))
+            keys.sort()
+            matches = [(self.players[pairs[index][0]], self.players[pairs[index][1]], turns,
+                        block_seeds[repetition][index]) for repetition, index in keys]
+            for (repetition, index), result in zip(keys, self.iter_matches(matches, processes=processes,
+                                                                          noise=noise, pool=pool)):
+                i, j = pairs[index]
+                payoffs[i, j, repetition], payoffs[j, i, repetition] = result[:2]
+            for repetition in range(count):
+                results.add(payoffs[:, :, repetition])
+            if confidence is not None and results.converged(confidence):
+                break
+            if seconds is not None and time.time() - started > seconds:
+                break
+        for player, score in zip(self.players, results.scores.total):
+            player.score += int(score)
+        return results
+
+    def read_checkpoint(self, checkpoint, turns, seed=None, noise=0, batched=False):
+        """
+        Reads the file of a tournament's checkpoint (starting it if it does
+        not exist). The first line describes the tournament (the signatures
+        of its players, see Player.signature, its turns, payoffs, noise and
+        seed, and whether it is batched) and every following line records
+        the scores and numbers of cooperations of a match as JSON. Returns
+        the seed (read from the file if not given) and a dictionary mapping
+        (repetition, i, j) to the scores and cooperations of the players of
+        indices i and j:
+
+            >>> import os, tempfile
+            >>> checkpoint = os.path.join(tempfile.mkdtemp(), 'tournament.json')
+            >>> axelrod = Axelrod(Defector(), Random())
+            >>> axelrod.read_checkpoint(checkpoint, turns=10, seed=3)
+            (3, {})
+            >>> results = axelrod.tournament(turns=10, repetitions=2, checkpoint=checkpoint)
+            >>> axelrod.read_checkpoint(checkpoint, turns=10)
+            (3, {(0, 0, 1): (20, 45, 0, 5), (1, 0, 1): (28, 43, 0, 3)})
+
+        An incomplete last line (of an interrupted write) is removed from the
+        file and a checkpoint of a different tournament is refused:
+
+            >>> with open(checkpoint, 'a') as f:
+            ...     f.write('{"repetition": 2, "pa')
+            >>> axelrod.read_checkpoint(checkpoint, turns=10)
+            (3, {(0, 0, 1): (20, 45, 0, 5), (1, 0, 1): (28, 43, 0, 3)})
+            >>> axelrod.read_checkpoint(checkpoint, turns=20)
+            Traceback (most recent call last):
+            ...
+            ValueError: The checkpoint was written by a different tournament
+            >>> axelrod.read_checkpoint(checkpoint, turns=10, batched=True)
+            Traceback (most recent call last):
+            ...
+            ValueError: The checkpoint was written by a different tournament
+
+        Players are told apart by their parameters, not only by their names:
+
+            >>> checkpoint = os.path.join(tempfile.mkdtemp(), 'tournament.json')
+            >>> results = Axelrod(Grumpy('Nice', 50, -50), Defector()).tournament(turns=10, checkpoint=checkpoint)
+            >>> Axelrod(Grumpy('Nice', 1, -1), Defector()).read_checkpoint(checkpoint, turns=10)
+            Traceback (most recent call last):
+            ...
+            ValueError: The checkpoint was written by a different tournament
+        """
+        header = {'players': [list(player.signature()) for player in self.players], 'turns': turns,
+                  'payoffs': self.payoffs.tolist(), 'noise': noise, 'seed': seed, 'batched': batched}
+        played = {}
+        if not os.path.exists(checkpoint) or not os.path.getsize(checkpoint):
+            if seed is None:
+                header['seed'] = random.getrandbits(32)
+            with open(checkpoint, 'w') as f:
+                f.write(json.dumps(header, sort_keys=True) + '\n')
+            return header['seed'], played
+        with open(checkpoint, 'r+') as f:
+            content = f.read()
+            complete = content.rfind('\n') + 1
+            f.seek(complete)
+            f.truncate()
+        lines = content[:complete].splitlines()
+        saved = json.loads(lines[0])
+        if seed is None:
+            header['seed'] = saved['seed']
+        if saved != header:
+            raise ValueError('The checkpoint was written by a different tournament')
+        for line in lines[1:]:
+            record = json.loads(line)
+            played[(record['repetition'],) + tuple(record['pair'])] = tuple(record['scores'] + record['cooperations'])
+        return header['seed'], played
+
+    def _open_checkpoint(self, checkpoint):
+        """
+        Returns a function appending the record of a match to the checkpoint
+        (doing nothing if there is no checkpoint). Every record is flushed as
+        soon as it is written.
+        """
+        f = open(checkpoint, 'a') if checkpoint is not None else None
+
+        def record(key, result, digest=None):
+            if f is not None:
+                line = {'repetition': key[0], 'pair': list(key[1:]),
+                        'scores': list(result[:2]), 'cooperations': list(result[2:])}
+                if digest is not None:
+                    line['digest'] = digest
+                f.write(json.dumps(line, sort_keys=True) + '\n')
+                f.flush()
+
+        record.close = f.close if f is not None else (lambda: None)
+        return record
+
+    def reset_player_history(self):
+        """
+        Resets all the player histories
+
+            >>> P1 = Defector()
+            >>> P1.history = ['C', 'D']
+            >>> P1.history
+            ['C', 'D']
+            >>> P2 = Cooperator()
+            >>> P2.history = ['D', 'D']
+            >>> P2.history
+            ['D', 'D']
+            >>> axelrod = Axelrod(P1, P2)
+            >>> axelrod.reset_player_history()
+            >>> P1.history
+            []
+            >>> P2.history
+            []
+        """
+        for player in self.players:
+            player.history.reset()
+
+    def calculate_scores(self, p1, p2):
+        """
+        Calculates the score for two players based their history and on the
+        payoff matrix which by default is the following:
+
+        - C vs C both get 2
+        - D vs D both get 4
+        - C vs D => C gets 5 and D gets 0
+
+            >>> P1 = Player()
+            >>> P1.history = ['C', 'C', 'D']
+            >>> P2 = Player()
+            >>> P2.history = ['C', 'D', 'D']
+            >>> axelrod = Axelrod(P1, P2)
+            >>> axelrod.calculate_scores(P1, P2)
+            (11, 6)
+
+            >>> P1 = Player()
+            >>> P1.history = ['C', 'C', 'C']
+            >>> P2 = Player()
+            >>> P2.history = ['C', 'C', 'C']
+            >>> axelrod = Axelrod(P1, P2)
+            >>> axelrod.calculate_scores(P1, P2)
+            (6, 6)
+
+            >>> P1 = Player()
+            >>> P1.history = ['D', 'D', 'D']
+            >>> P2 = Player()
+            >>> P2.history = ['D', 'D', 'D']
+            >>> axelrod = Axelrod(P1, P2)
+            >>> axelrod.calculate_scores(P1, P2)
+            (12, 12)
+        """
+        s1, s2 = self.calculate_turn_scores(p1, p2)
+        return int(s1.sum()), int(s2.sum())
+
+    def calculate_turn_scores(self, p1, p2):
+        """
+        Calculates the score of each turn for two players by looking up their
+        encoded histories in the payoff matrix:
+
+            >>> P1 = Player()
+            >>> P1.history = ['C', 'C', 'D']
+            >>> P2 = Player()
+            >>> P2.history = ['C', 'D', 'D']
+            >>> axelrod = Axelrod(P1, P2)
+            >>> s1, s2 = axelrod.calculate_turn_scores(P1, P2)
+            >>> s1
+            array([2, 5, 4])
+            >>> s2
+            array([2, 0, 4])
+
+        This uses the payoff matrix of the tournament:
+
+            >>> axelrod = Axelrod(P1, P2, payoffs=((1, 3), (0, 2)))
+            >>> axelrod.calculate_turn_scores(P1, P2)
+            (array([1, 3, 2]), array([1, 0, 2]))
+        """
+        h1, h2 = encode(p1.history), encode(p2.history)
+        return self.payoffs[h1, h2], self.payoffs[h2, h1]
+
+    def expected_payoffs(self, p1, p2, turns=None):
+        """
+        Calculates the exact expected score per turn of two memory one
+        players (see MemoryOne) from the Markov chain over the four outcomes
+        of a turn: averaged over a match of the given number of turns or, if
+        turns is None, in the long run (from the stationary distribution).
+
+        A memory one Tit For Tat against a memory one Defector:
+
+            >>> axelrod = Axelrod()
+            >>> P1, P2 = MemoryOne((1, 0, 1, 0)), MemoryOne((0, 0, 0, 0), initial=0)
+            >>> axelrod.expected_payoffs(P1, P2, turns=10)
+            (4.1, 3.6)
+            >>> axelrod.expected_payoffs(P1, P2)
+            (4.0, 4.0)
+
+        Stochastic strategies are handled exactly:
+
+            >>> P1, P2 = MemoryOne((0.9, 0.5, 0.5, 0.1)), MemoryOne((0.5, 0.5, 0.5, 0.5))
+            >>> [round(payoff, 4) for payoff in axelrod.expected_payoffs(P1, P2)]
+            [2.75, 2.75]
+
+        A chain with more than one stationary distribution needs a number of
+        turns:
+
+            >>> axelrod.expected_payoffs(MemoryOne((1, 0, 1, 0)), MemoryOne((1, 0, 1, 0)))
+            Traceback (most recent call last):
+            ...
+            ValueError: There is no unique stationary distribution: give a number of turns
+        """
+        probabilities = numpy.zeros((2, 2, 2))
+        for a in range(2):
+            for b in range(2):
+                probabilities[a, b] = (p1.probabilities[2 * a + b], p2.probabilities[2 * b + a])
+        chain = numpy.zeros((4, 4))
+        for state in range(4):
+            a, b = divmod(state, 2)
+            q1, q2 = probabilities[a, b]
+            chain[state] = numpy.outer([q1, 1 - q1], [q2, 1 - q2]).flatten()
+        if turns is None:
+            system = numpy.vstack([chain.T - numpy.eye(4), numpy.ones(4)])
+            if numpy.linalg.matrix_rank(system[:4]) < 3:
+                raise ValueError('There is no unique stationary distribution: give a number of turns')
+            distribution = numpy.linalg.lstsq(system, [0, 0, 0, 0, 1], rcond=None)[0]
+        else:
+            start = numpy.outer([p1.initial, 1 - p1.initial], [p2.initial, 1 - p2.initial]).flatten()
+            distribution = start.dot(_power_sum(chain, turns)) / turns
+        outcomes = numpy.array(list(itertools.product(range(2), repeat=2)))
+        v1 = distribution.dot(self.payoffs[outcomes[:, 0], outcomes[:, 1]])
+        v2 = distribution.dot(self.payoffs[outcomes[:, 1], outcomes[:, 0]])
+        return round(float(v1), 12), round(float(v2), 12)
+
+
+class Results(object):
+    """
+    The results of a tournament (see Axelrod.tournament) kept in arrays
+    indexed by the players (in the order of the tournament) and the
+    repetitions:
+
+    - payoffs: the total score of every player (first index) against every
+      other player (second index) in every repetition.
+    - cooperation: the rate of cooperation of every player against every
+      other player in every repetition (nan against itself).
+    - scores: the total score of every player in every repetition.
+
+    Along with the turns and noise of the matches (None and 0 if unknown).
+
+        >>> P1, P2 = Defector(), Cooperator()
+        >>> payoffs = numpy.array([[[0, 0], [0, 0]], [[50, 50], [0, 0]]])
+        >>> cooperation = numpy.array([[[numpy.nan] * 2, [0, 0]], [[1, 1], [numpy.nan] * 2]])
+        >>> results = Results([P1, P2], payoffs, cooperation)
+        >>> results.scores
+        array([[ 0,  0],
+               [50, 50]])
+        >>> results[P2]
+        array([50, 50])
+        >>> results.turns, results.noise
+        (None, 0)
+    """
+    def __init__(self, players, payoffs, cooperation, turns=None, noise=0):
+        self.players = list(players)
+        self.payoffs = payoffs
+        self.cooperation = cooperation
+        self.turns = turns
+        self.noise = noise
+        self.scores = payoffs.sum(axis=1)
+
+    def __getitem__(self, player):
+        return self.scores[self.players.index(player)]
+
+    def mean(self):
+        """
+        The mean score of every player over the repetitions:
+
+            >>> results = Axelrod(Defector(), TitForTat()).tournament(turns=10, repetitions=2)
+            >>> results.mean()
+            array([36., 41.])
+        """
+        return self.scores.mean(axis=1)
+
+    def quantile(self, q):
+        """
+        The q quantile (between 0 and 1) of the scores of every player over
+        the repetitions:
+
+            >>> results = Axelrod(Defector(), Random()).tournament(turns=10, repetitions=5, seed=1)
+            >>> results.scores
+            array([[24, 24, 20, 24, 20],
+                   [44, 44, 45, 44, 45]])
+            >>> results.quantile(0.5)
+            array([24., 44.])
+        """
+        return numpy.percentile(self.scores, 100 * q, axis=1)
+
+    def ranking(self):
+        """
+        The players from the lowest (best) mean score to the highest:
+
+            >>> results = Axelrod(Cooperator(), Defector()).tournament(turns=10, repetitions=2)
+            >>> results.ranking()
+            [Defector, Cooperator]
+        """
+        return [self.players[index] for index in numpy.argsort(self.mean(), kind='mergesort')]
+
+    def mean_payoffs(self, self_play=None):
+        """
+        The mean score of every player against every other player over the
+        repetitions:
+
+            >>> axelrod = Axelrod(Cooperator(), Defector())
+            >>> results = axelrod.tournament(turns=10, repetitions=2)
+            >>> results.mean_payoffs()
+            array([[ 0., 50.],
+                   [ 0.,  0.]])
+
+        The players do not play themselves in a tournament so the diagonal
+        is 0 unless the scores of self play are given (see
+        Axelrod.self_play):
+
+            >>> results.mean_payoffs(self_play=axelrod.self_play(turns=10))
+            array([[20., 50.],
+                   [ 0., 40.]])
+        """
+        table = self.payoffs.mean(axis=2)
+        if self_play is not None:
+            table[numpy.diag_indices(len(self.players))] = self_play
+        return table
+
+    def cooperation_rates(self):
+        """
+        The rate of cooperation of every player over all its matches:
+
+            >>> results = Axelrod(Cooperator(), Defector(), TitForTat()).tournament(turns=10, repetitions=2)
+            >>> results.cooperation_rates()
+            array([1.  , 0.  , 0.55])
+        """
+        size = len(self.players)
+        rates = self.cooperation[~numpy.eye(size, dtype=bool)].reshape(size, -1)
+        return rates.mean(axis=1)
+
+
+class RunningStatistics(object):
+    """
+    Statistics of a stream of arrays (of a given shape) kept in constant
+    memory: the count, total, mean, minimum and maximum, the variance (with
+    Welford's update) and approximate quantiles from a uniform sample of the
+    arrays (a reservoir of a given size, so the quantiles are exact until
+    there are more arrays than that).
+
+        >>> statistics = RunningStatistics(shape=(2,), sample=3, seed=0)
+        >>> for values in ([1, 10], [2, 20], [3, 30], [4, 40]):
+        ...     statistics.add(values)
+        >>> statistics.count, statistics.total, statistics.mean
+        (4, array([ 10., 100.]), array([ 2.5, 25. ]))
+        >>> statistics.minimum, statistics.maximum
+        (array([ 1., 10.]), array([ 4., 40.]))
+        >>> statistics.variance()
+        array([  1.66666667, 166.66666667])
+        >>> statistics.quantile(0.5)
+        array([ 3., 30.])
+    """
+    def __init__(self, shape=(), sample=100, seed=None):
+        self.count = 0
+        self.total = numpy.zeros(shape)
+        self.mean = numpy.zeros(shape)
+        self.squares = numpy.zeros(shape)
+        self.minimum = numpy.full(shape, numpy.inf)
+        self.maximum = numpy.full(shape, -numpy.inf)
+        self.sample = numpy.zeros((sample,) + self.mean.shape)
+        self.random_state = numpy.random.RandomState(seed)
+
+    def add(self, values):
+        """
+        Adds an array to the statistics
+        """
+        values = numpy.asarray(values, dtype=float)
+        self.count += 1
+        self.total += values
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (values - self.mean)
+        numpy.minimum(self.minimum, values, out=self.minimum)
+        numpy.maximum(self.maximum, values, out=self.maximum)
+        if self.count <= len(self.sample):
+            self.sample[self.count - 1] = values
+        else:
+            index = self.random_state.randint(self.count)
+            if index < len(self.sample):
+                self.sample[index] = values
+
+    def variance(self):
+        """
+        The (unbiased) variance of the arrays (nan until there are two)
+        """
+        if self.count < 2:
+            return numpy.full(self.mean.shape, numpy.nan)
+        return self.squares / (self.count - 1)
+
+    def quantile(self, q):
+        """
+        The approximate q quantile (between 0 and 1) of the arrays
+        """
+        return numpy.percentile(self.sample[:min(self.count, len(self.sample))], 100 * q, axis=0)
+
+
+class StreamingResults(object):
+    """
+    The results of a streamed tournament (see Axelrod.tournament with
+    streaming=True) kept as RunningStatistics of the total score of every
+    player (scores) and of the score of every player against every other
+    player (payoffs) over the repetitions, whatever their number. It
+    answers like Results:
+
+        >>> results = StreamingResults([Defector(), Cooperator()], seed=0)
+        >>> results.add(numpy.array([[0, 0], [50, 0]]))
+        >>> results.add(numpy.array([[0, 0], [40, 0]]))
+        >>> results.repetitions, results.mean(), results.quantile(1)
+        (2, array([ 0., 45.]), array([ 0., 50.]))
+        >>> results.ranking()
+        [Defector, Cooperator]
+        >>> results.mean_payoffs()
+        array([[ 0.,  0.],
+               [45.,  0.]])
+        >>> results.scores.variance()
+        array([ 0., 50.])
+    """
+    def __init__(self, players, sample=100, seed=None):
+        self.players = list(players)
+        size = len(self.players)
+        self.scores = RunningStatistics((size,), sample, seed)
+        self.payoffs = RunningStatistics((size, size), sample, seed)
+
+    @property
+    def repetitions(self):
+        return self.scores.count
+
+    def add(self, payoffs):
+        """
+        Adds the scores of every player against every other player in a
+        repetition
+        """
+        self.payoffs.add(payoffs)
+        self.scores.add(payoffs.sum(axis=1))
+
+    def mean(self):
+        """
+        The mean score of every player over the repetitions
+        """
+        return self.scores.mean.copy()
+
+    def quantile(self, q):
+        """
+        The approximate q quantile of the scores of every player
+        """
+        return self.scores.quantile(q)
+
+    def ranking(self):
+        """
+        The players from the lowest (best) mean score to the highest
+        """
+        return [self.players[index] for index in numpy.argsort(self.mean(), kind='mergesort')]
+
+    def mean_payoffs(self, self_play=None):
+        """
+        The mean score of every player against every other player over the
+        repetitions (with the scores of self play on the diagonal if given,
+        see Results.mean_payoffs)
+        """
+        table = self.payoffs.mean.copy()
+        if self_play is not None:
+            table[numpy.diag_indices(len(self.players))] = self_play
+        return table
+
+    def intervals(self, confidence):
+        """
+        The lower and upper bounds of the confidence intervals of the mean
+        score of every player (from Student's t distribution, which is wider
+        than the normal distribution for few repetitions):
+
+            >>> results = StreamingResults([Defector(), Random()])
+            >>> for scores in ([10, 40], [10, 50], [10, 60]):
+            ...     results.add(numpy.array([[0, scores[0]], [scores[1], 0]]))
+            >>> low, high = results.intervals(0.95)
+            >>> low.round(2), high.round(2)
+            (array([10.  , 25.16]), array([10.  , 74.84]))
+
+        With less than two repetitions the intervals are infinite:
+
+            >>> StreamingResults([Defector(), Random()]).intervals(0.95)
+            (array([-inf, -inf]), array([inf, inf]))
+        """
+        if self.repetitions < 2:
+            infinite = numpy.full(len(self.players), numpy.inf)
+            return -infinite, infinite
+        quantile = student_quantile((1 + confidence) / 2.0, self.repetitions - 1)
+        width = quantile * numpy.sqrt(self.scores.variance() / self.repetitions)
+        return self.mean() - width, self.mean() + width
+
+    def converged(self, confidence):
+        """
+        Whether the ranking is stable at a confidence: the confidence
+        intervals of every two players next to each other in the ranking do
+        not overlap (unless both are reduced to the same point: the players
+        are tied in every repetition). There must be two repetitions at
+        least:
+
+            >>> results = StreamingResults([Defector(), Random()])
+            >>> for scores in ([10, 20], [10, 40], [10, 60], [10, 30], [10, 50]):
+            ...     results.add(numpy.array([[0, scores[0]], [scores[1], 0]]))
+            >>> results.converged(0.95)
+            True
+            >>> results.converged(0.999)
+            False
+        """
+        if self.repetitions < 2:
+            return False
+        low, high = self.intervals(confidence)
+        order = numpy.argsort(self.mean(), kind='mergesort')
+        for first, second in zip(order, order[1:]):
+            tied = low[first] == high[first] == low[second] == high[second]
+            if high[first] >= low[second] and not tied:
+                return False
+        return True
+
+
+class MatchCache(object):
+    """
+    A cache of the results of matches kept on disk (one small file per
+    match, named by a digest of everything the match depends on: the
+    signatures of both players (see Player.signature), the number of turns,
+    the payoffs, the noise and, for stochastic matches, the seed) so that
+    later tournaments only play the matches that involve new or changed
+    strategies. Stochastic matches without a seed are never cached.
+
+    At most a number of entries are kept: the least recently used are
+    removed first (the order is kept in the modification times of the
+    files so that it survives between runs):
+
+        >>> import tempfile
+        >>> cache = MatchCache(tempfile.mkdtemp(), entries=2)
+        >>> axelrod = Axelrod(Defector(), TitForTat(), Grumpy(), cache=cache)
+        >>> results = axelrod.tournament(turns=100, repetitions=1)
+        >>> len(cache)
+        2
+        >>> key = cache.key(Defector(), TitForTat(), 100, None, 0, axelrod.payoffs)
+        >>> print cache.get(key)
+        None
+        >>> key = cache.key(TitForTat(), Grumpy(), 100, None, 0, axelrod.payoffs)
+        >>> cache.get(key)
+        (200, 200, 100, 100)
+
+    Strategies are only known by their signatures: the cache must be
+    cleared (by removing its directory) when the code of a strategy changes.
+
+    Only the scores are kept, not the histories: the players of a match
+    found in the cache are left as they were. A round robin played in this
+    process leaves the histories of its matches with the players, so it
+    does not use the cache:
+
+        >>> axelrod = Axelrod(Defector(), Grumpy(), cache=cache)
+        >>> axelrod.round_robin(turns=100)
+        >>> [len(player.history) for player in axelrod.players]
+        [100, 100]
+    """
+    def __init__(self, directory, entries=10 ** 5):
+        self.directory = directory
+        self.entries = entries
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+        self.used = collections.OrderedDict((name[:-len('.json')], None) for name in names)
+
+    def __len__(self):
+        return len(self.used)
+
+    def key(self, p1, p2, turns, seed, noise, payoffs):
+        """
+        The digest of a match (None if the match is stochastic and has no
+        seed)
+        """
+        stochastic = bool(noise) or p1.stochastic or p2.stochastic
+        if stochastic and seed is None:
+            return None
+        content = json.dumps([p1.signature(), p2.signature(), turns, numpy.asarray(payoffs).tolist(), noise,
+                              seed if stochastic else None])
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        The scores and cooperations of a match (None if not cached)
+        """
+        if key is None or key not in self.used:
+            return None
+        try:
+            with open(self.path(key)) as f:
+                scores = tuple(json.load(f))
+            os.utime(self.path(key), None)
+        except (IOError, OSError, ValueError):
+            self.used.pop(key)
+            return None
+        self.used.pop(key)
+        self.used[key] = None
+        return scores
+
+    def put(self, key, scores):
+        """
+        Caches the scores and cooperations of a match (removing the least
+        recently used matches beyond the number of entries)
+        """
+        if key is None:
+            return
+        temporary = '%s.%s.tmp' % (self.path(key), os.getpid())
+        with open(temporary, 'w') as f:
+            json.dump([int(score) for score in scores], f)
+        os.rename(temporary, self.path(key))
+        self.used.pop(key, None)
+        self.used[key] = None
+        while len(self.used) > self.entries:
+            oldest = self.used.popitem(last=False)[0]
+            try:
+                os.remove(self.path(oldest))
+            except OSError:
+                pass
+
+
+def _timed(decide, counts):
+    """
+    Wraps a decision method of a player so that every call adds to counts
+    (a list of the number of calls and the seconds they took)
+    """
+    def timed(*args):
+        start = time.time()
+        try:
+            return decide(*args)
+        finally:
+            counts[0] += 1
+            counts[1] += time.time() - start
+    return timed
+
+
+def _strategy_name(player):
+    """
+    The name of the class of a player along with its module (as in
+    Player.signature), so that strategies of the same name from different
+    modules are told apart:
+
+        >>> _strategy_name(TitForTat())
+        'axelrod.TitForTat'
+    """
+    return '%s.%s' % (type(player).__module__, type(player).__name__)
+
+
+class Profile(object):
+    """
+    Records where the time of the matches of a tournament goes (see
+    Axelrod.__init__): the number of decisions and the time they took for
+    every strategy (a class of player) along with the number of matches and
+    their wall time for every pairing of strategies.
+
+    Decisions are only timed for the matches played turn by turn (or in
+    batches, where one decision gives the moves of every copy): matches
+    between state machines (see Player.state_machine) make none. When there
+    is no profile, none of this is done.
+
+        >>> profile = Profile()
+        >>> axelrod = Axelrod(TitForTat(), Random(), Defector(), profile=profile)
+        >>> axelrod.round_robin(turns=100)
+        >>> sorted(profile.strategies)
+        ['axelrod.Defector', 'axelrod.Random', 'axelrod.TitForTat']
+        >>> [profile.strategies[name][0] for name in sorted(profile.strategies)]
+        [100, 200, 100]
+        >>> sorted(profile.pairings)
+        [('axelrod.Random', 'axelrod.Defector'), ('axelrod.TitForTat', 'axelrod.Defector'), ('axelrod.TitForTat', 'axelrod.Random')]
+        >>> [profile.pairings[pairing][0] for pairing in sorted(profile.pairings)]
+        [1, 1, 1]
+
+    The report lists the strategies by decision time and the pairings by
+    wall time:
+
+        >>> lines = profile.report().splitlines()
+        >>> print lines[0]
+        Strategy                          Decisions     Seconds  Microseconds each
+        >>> print lines[5]
+        Pairing                                                   Matches     Seconds
+        >>> len(lines)
+        9
+
+    Profiles cannot be gathered from other processes:
+
+        >>> Axelrod(TitForTat(), Random(), profile=profile).round_robin(turns=100, processes=2)
+        Traceback (most recent call last):
+        ...
+        ValueError: A profiled tournament must be played without processes
+    """
+    def __init__(self):
+        self.strategies = {}
+        self.pairings = {}
+
+    def watch(self, players, method):
+        """
+        Times the decisions (made by the given method) of players until they
+        are released
+        """
+        for player in players:
+            if method not in vars(player):
+                counts = self.strategies.setdefault(_strategy_name(player), [0, 0.0])
+                setattr(player, method, _timed(getattr(player, method), counts))
+
+    def release(self, players, method):
+        """
+        Stops timing the decisions of players
+        """
+        for player in players:
+            vars(player).pop(method, None)
+
+    def record(self, p1, p2, seconds, matches=1):
+        """
+        Records the wall time of matches between two players
+        """
+        counts = self.pairings.setdefault((_strategy_name(p1), _strategy_name(p2)), [0, 0.0])
+        counts[0] += matches
+        counts[1] += seconds
+
+    def report(self):
+        """
+        Returns a table of the strategies (by decision time) and pairings (by
+        wall time), slowest first
+        """
+        lines = ['%-32s %10s %11s  %s' % ('Strategy', 'Decisions', 'Seconds', 'Microseconds each')]
+        for name, (calls, seconds) in sorted(self.strategies.items(), key=lambda item: -item[1][1]):
+            lines.append('%-32s %10d %11.6f  %.3f' % (name, calls, seconds, 10 ** 6 * seconds / max(calls, 1)))
+        lines.append('')
+        lines.append('%-56s %8s %11s' % ('Pairing', 'Matches', 'Seconds'))
+        for (name1, name2), (matches, seconds) in sorted(self.pairings.items(), key=lambda item: -item[1][1]):
+            lines.append('%-56s %8d %11.6f' % ('%s v %s' % (name1, name2), matches, seconds))
+        return '\n'.join(lines)
+
+
+class MoranProcess(object):
+    """
+    A Moran (birth death) process over a population made of a number of
+    individuals of every strategy type. Every generation one individual is
+    chosen to reproduce (with a probability proportional to its fitness) and
+    replaces an individual chosen uniformly at random.
+
+    The population is only kept as the counts of every type and the mean
+    score per turn of every type against every other type is calculated once
+    (playing a match between two copies of the representative players) and
+    kept in a table, so generations are not slowed down by matches or by the
+    size of the population:
+
+        >>> moran = MoranProcess([Defector(), TitForTat()], counts=[10, 90], turns=10, seed=1)
+        >>> moran.table
+        array([[4. , 3.6],
+               [4.1, 2. ]])
+
+    Scores are costs (remember that a low score is a good score) so the
+    fitness of an individual is exp(-intensity * score) where score is its
+    mean score per turn against the rest of the population:
+
+        >>> moran.fitness()
+        array([0.02634798, 0.1094682 ])
+
+    A table (for instance from Results.mean_payoffs divided by the number of
+    turns) can be given instead of playing the matches.
+    """
+    def __init__(self, players, counts, turns=200, payoffs=PAYOFFS, intensity=1, seed=None, table=None):
+        self.players = list(players)
+        self.counts = numpy.array(counts, dtype=int)
+        self.turns = turns
+        self.intensity = intensity
+        self.random_state = numpy.random.RandomState(seed)
+        if table is None:
+            table = self.play_table(Axelrod(payoffs=payoffs))
+        self.table = numpy.array(table, dtype=float)
+        self.totals = self.table.dot(self.counts)
+
+    def play_table(self, axelrod):
+        """
+        Plays a match between every pair of types (including a type against
+        itself) and returns the mean scores per turn.
+        """
+        size = len(self.players)
+        table = numpy.zeros((size, size))
+        for i, j in itertools.combinations_with_replacement(range(size), 2):
+            p1, p2 = copy.deepcopy(self.players[i]), copy.deepcopy(self.players[j])
+            table[i, j], table[j, i] = axelrod.play_match(p1, p2, self.turns)
+        return table / float(self.turns)
+
+    def fitness(self):
+        """
+        The fitness of an individual of every type (given the current
+        population).
+        """
+        scores = (self.totals - self.table.diagonal()) / float(max(self.counts.sum() - 1, 1))
+        return numpy.exp(-self.intensity * scores)
+
+    def step(self):
+        """
+        Plays a generation: returns the types of the individual born and of
+        the one that died.
+
+            >>> moran = MoranProcess([Defector(), TitForTat()], counts=[10, 90], turns=10, seed=1)
+            >>> moran.step()
+            (1, 1)
+            >>> moran.counts
+            array([10, 90])
+        """
+        weights = self.counts * self.fitness()
+        born = numpy.searchsorted(numpy.cumsum(weights), self.random_state.random_sample() * weights.sum(),
+                                  side='right')
+        died = numpy.searchsorted(numpy.cumsum(self.counts), self.random_state.randint(self.counts.sum()),
+                                  side='right')
+        self.counts[born] += 1
+        self.counts[died] -= 1
+        self.totals += self.table[:, born] - self.table[:, died]
+        return int(born), int(died)
+
+    def fixated(self):
+        """
+        The type that has taken over the whole population (None if there is
+        none yet).
+
+            >>> print MoranProcess([Defector(), TitForTat()], counts=[1, 1], turns=10).fixated()
+            None
+            >>> MoranProcess([Defector(), TitForTat()], counts=[0, 2], turns=10).fixated()
+            1
+        """
+        present = numpy.flatnonzero(self.counts)
+        if len(present) == 1:
+            return int(present[0])
+        return None
+
+    def play(self, generations):
+        """
+        Plays a number of generations (stopping if a type takes over) and
+        returns the counts of every type after every generation:
+
+            >>> moran = MoranProcess([Defector(), TitForTat(), Cooperator()], counts=[20, 40, 40], turns=10, seed=2)
+            >>> counts = moran.play(generations=10000)
+            >>> counts.shape, moran.fixated(), moran.players[moran.fixated()]
+            ((1607, 3), 1, Tit For Tat)
+            >>> counts[0], counts[-1]
+            (array([20, 40, 40]), array([  0, 100,   0]))
+        """
+        counts = [self.counts.copy()]
+        for generation in range(generations):
+            if self.fixated() is not None:
+                break
+            self.step()
+            counts.append(self.counts.copy())
+        return numpy.array(counts)
+
+
+def ring(size, neighbours=1):
+    """
+    The edges of a ring of players, each playing the given number of
+    neighbours on either side:
+
+        >>> ring(4)
+        [(0, 1), (1, 2), (2, 3), (3, 0)]
+        >>> len(ring(10, neighbours=2))
+        20
+
+    Every pair of neighbours shares a single edge, even in small rings:
+
+        >>> ring(2), ring(4, neighbours=2)
+        ([(0, 1)], [(0, 1), (1, 2), (2, 3), (3, 0), (0, 2), (1, 3)])
+    """
+    edges = []
+    seen = set()
+    for k in range(1, neighbours + 1):
+        for i in range(size):
+            j = (i + k) % size
+            if i != j and (j, i) not in seen and (i, j) not in seen:
+                seen.add((i, j))
+                edges.append((i, j))
+    return edges
+
+
+def lattice(rows, columns):
+    """
+    The edges of a square lattice of players (wrapped around as a torus),
+    each playing its four neighbours. Player i sits on row i // columns:
+
+        >>> lattice(2, 3)
+        [(0, 1), (0, 3), (1, 2), (1, 4), (2, 0), (2, 5), (3, 4), (4, 5), (5, 3)]
+    """
+    edges = set()
+    for row in range(rows):
+        for column in range(columns):
+            i = row * columns + column
+            for j in (row * columns + (column + 1) % columns, ((row + 1) % rows) * columns + column):
+                if i != j and (j, i) not in edges:
+                    edges.add((i, j))
+    return sorted(edges)
+
+
+class SpatialTournament(object):
+    """
+    A tournament on a graph: every player (a node) only plays its neighbours
+    (the players it shares an edge with, see ring and lattice) so a round
+    costs a match per edge rather than per pair of players.
+
+    As in MoranProcess the nodes are only kept as the indices of their
+    strategy types, and the scores of matches between two deterministic
+    types are played once and kept in a table. The matches involving a
+    stochastic type are played on every edge, side by side (see
+    Axelrod.play_batch) for all the edges between the same two types:
+
+        >>> spatial = SpatialTournament([Defector(), TitForTat()], [0, 1, 1, 1, 1, 1], ring(6), turns=10)
+        >>> spatial.play_round()
+        array([72, 61, 40, 40, 40, 61])
+
+    Scores are costs (remember that a low score is a good score). Between
+    rounds every node can imitate the strategy of the neighbour (or keep
+    its own) with the lowest mean score per match:
+
+        >>> spatial.imitate()
+        array([1, 1, 1, 1, 1, 1])
+    """
+    def __init__(self, players, strategies, edges, turns=200, payoffs=PAYOFFS, seed=None):
+        self.players = list(players)
+        self.strategies = numpy.array(strategies, dtype=int)
+        self.edges = numpy.array(edges, dtype=int).reshape(-1, 2)
+        self.turns = turns
+        self.random_state = numpy.random.RandomState(seed)
+        self.axelrod = Axelrod(payoffs=payoffs)
+        self.copies = [[copy.deepcopy(player) for player in self.players] for side in range(2)]
+        self.degrees = numpy.bincount(self.edges.ravel(), minlength=len(self.strategies))
+        self.scores = numpy.zeros(len(self.strategies), dtype=int)
+        size = len(self.players)
+        self.table = numpy.zeros((size, size, 2), dtype=int)
+        deterministic = [i for i in range(size) if not self.players[i].stochastic]
+        for i, j in itertools.combinations_with_replacement(deterministic, 2):
+            s1, s2 = self.axelrod.play_match(self.copies[0][i], self.copies[1][j], turns)
+            self.table[i, j], self.table[j, i] = (s1, s2), (s2, s1)
+
+    def play_round(self):
+        """
+        Plays a match on every edge and returns the total score of every
+        node.
+        """
+        first, second = self.strategies[self.edges[:, 0]], self.strategies[self.edges[:, 1]]
+        scores = self.table[first, second]
+        stochastic = numpy.array([player.stochastic for player in self.players], dtype=bool)
+        edges = numpy.flatnonzero(stochastic[first] | stochastic[second])
+        pairs = first[edges] * len(self.players) + second[edges]
+        for pair in numpy.unique(pairs):
+            group = edges[pairs == pair]
+            p1, p2 = self.copies[0][first[group[0]]], self.copies[1][second[group[0]]]
+            seed = self.random_state.randint(2 ** 31)
+            if p1.declares('batch_strategy') and p2.declares('batch_strategy'):
+                s1, s2 = self.axelrod.play_batch(p1, p2, self.turns, len(group), seed=seed)
+                scores[group, 0], scores[group, 1] = s1, s2
+            else:
+                random.seed(seed)
+                for edge in group:
+                    scores[edge] = self.axelrod.play_match(p1, p2, self.turns)
+        size = len(self.strategies)
+        self.scores = (numpy.bincount(self.edges[:, 0], scores[:, 0], minlength=size) +
+                       numpy.bincount(self.edges[:, 1], scores[:, 1], minlength=size)).astype(int)
+        return self.scores
+
+    def imitate(self):
+        """
+        Every node takes the strategy of the neighbour with the lowest mean
+        score per match in the last round if it is lower than its own (all
+        at once). Returns the new strategies.
+        """
+        means = self.scores / numpy.maximum(self.degrees, 1).astype(float)
+        sources = numpy.concatenate((self.edges[:, 0], self.edges[:, 1]))
+        targets = numpy.concatenate((self.edges[:, 1], self.edges[:, 0]))
+        best = means.copy()
+        numpy.minimum.at(best, targets, means[sources])
+        better = (means[sources] == best[targets]) & (best[targets] < means[targets])
+        strategies = self.strategies.copy()
+        strategies[targets[better]] = self.strategies[sources[better]]
+        self.strategies = strategies
+        return self.strategies
+
+    def play(self, rounds, imitation=True):
+        """
+        Plays a number of rounds (imitating between them if imitation=True)
+        and returns the number of nodes of every type after every round:
+
+            >>> players = [Defector(), TitForTat(), Cooperator()]
+            >>> strategies = numpy.random.RandomState(0).randint(3, size=100)
+            >>> spatial = SpatialTournament(players, strategies, lattice(10, 10), turns=10)
+            >>> counts = spatial.play(rounds=5)
+            >>> counts[0], counts[-1]
+            (array([39, 34, 27]), array([ 8, 88,  4]))
+        """
+        counts = [numpy.bincount(self.strategies, minlength=len(self.players))]
+        for round in range(rounds):
+            self.play_round()
+            if imitation:
+                self.imitate()
+            counts.append(numpy.bincount(self.strategies, minlength=len(self.players)))
+        return numpy.array(counts)
+
+
+class ReplicatorDynamics(object):
+    """
+    The replicator dynamics of a population mixing a number of strategies,
+    driven by a table of the mean score of every strategy against every
+    other (for instance the mean payoffs of a tournament with the scores of
+    every strategy against itself on the diagonal, see Axelrod.self_play):
+
+        >>> axelrod = Axelrod(Defector(), TitForTat(), Cooperator())
+        >>> results = axelrod.tournament(turns=10, repetitions=1)
+        >>> dynamics = ReplicatorDynamics(results.mean_payoffs(self_play=axelrod.self_play(turns=10)))
+
+    Scores are costs so the frequency x_i of strategy i changes at the rate
+    x_i (x.Ax - (Ax)_i): strategies with a lower score than the average grow.
+
+        >>> dynamics.derivative(numpy.array([0.5, 0.5, 0]))
+        array([-1.875,  1.875, -0.   ])
+    """
+    def __init__(self, table):
+        self.table = numpy.array(table, dtype=float)
+
+    def derivative(self, x):
+        scores = self.table.dot(x)
+        return x * (x.dot(scores) - scores)
+
+    def step(self, x, dt):
+        """
+        A fourth order Runge Kutta step of length dt (kept on the simplex).
+        """
+        k1 = self.derivative(x)
+        k2 = self.derivative(x + dt / 2. * k1)
+        k3 = self.derivative(x + dt / 2. * k2)
+        k4 = self.derivative(x + dt * k3)
+        x = numpy.clip(x + dt / 6. * (k1 + 2 * k2 + 2 * k3 + k4), 0, None)
+        return x / x.sum()
+
+    def trajectory(self, x, time, steps=1000):
+        """
+        The frequencies of the strategies at steps + 1 evenly spaced times
+        from x (at time 0) to the given time:
+
+            >>> dynamics = ReplicatorDynamics([[4, 3.6], [4.1, 2]])
+            >>> trajectory = dynamics.trajectory([0.9, 0.1], time=5, steps=500)
+            >>> trajectory.shape
+            (501, 2)
+            >>> trajectory[-1].round(4)
+            array([0.8375, 0.1625])
+        """
+        x = numpy.array(x, dtype=float)
+        x /= x.sum()
+        dt = time / float(steps)
+        trajectory = [x]
+        for step in range(steps):
+            x = self.step(x, dt)
+            trajectory.append(x)
+        return numpy.array(trajectory)
+
+    def rest_point(self, x, tolerance=1e-10, dt=0.1, max_steps=10 ** 5):
+        """
+        Integrates from x until the frequencies stop changing (by less than
+        tolerance) and returns the rest point reached (None if it is not
+        reached within max_steps):
+
+            >>> dynamics = ReplicatorDynamics([[4, 3.6], [4.1, 2]])
+            >>> dynamics.rest_point([0.9, 0.1]).round(6)
+            array([0., 1.])
+        """
+        x = numpy.array(x, dtype=float)
+        x /= x.sum()
+        for step in range(max_steps):
+            if numpy.abs(self.derivative(x)).max() < tolerance:
+                return x
+            x = self.step(x, dt)
+        return None
+
+    def rest_points(self, starts=20, seed=None, decimals=6, **kwargs):
+        """
+        The distinct rest points reached from a number of random starting
+        points of the simplex (arguments of ReplicatorDynamics.rest_point can
+        be given):
+
+            >>> dynamics = ReplicatorDynamics([[2, 5], [0, 4]])
+            >>> dynamics.rest_points(starts=5, seed=1)
+            [array([0., 1.])]
+        """
+        random_state = numpy.random.RandomState(seed)
+        points = []
+        for x in random_state.dirichlet(numpy.ones(len(self.table)), size=starts):
+            point = self.rest_point(x, **kwargs)
+            if point is not None:
+                point = point.round(decimals)
+                if not any((point == other).all() for other in points):
+                    points.append(point)
+        return points
+
+
+class History(object):
+    """
+    A compact history of moves: every move is stored as a single byte (its
+    index in MOVES) in a bytearray. It reads like a list of 'C' and 'D':
+
+        >>> history = History(['C', 'D'])
+        >>> history.append('D')
+        >>> history
+        ['C', 'D', 'D']
+        >>> history[-1], len(history), 'C' in history
+        ('D', 3, True)
+        >>> history == ['C', 'D', 'D'], history == None
+        (True, False)
+
+    Slices are also histories:
+
+        >>> history[1:]
+        ['D', 'D']
+
+    Only 'C' and 'D' are valid moves:
+
+        >>> history.append('X')
+        Traceback (most recent call last):
+        ...
+        ValueError: A move must be one of 'C' or 'D'
+
+    With a depth only the last moves (at least the last one) are kept in a
+    ring buffer, along with the running counts, so the memory does not grow
+    with the length of the match:
+
+        >>> history = History('CDDCC', depth=2)
+        >>> history, len(history), history.defections(), history.streak()
+        (['C', 'C'], 5, 2, 2)
+        >>> history[-2], 'D' in history
+        ('C', True)
+        >>> history[0]
+        Traceback (most recent call last):
+        ...
+        IndexError: history index out of range
+
+    Such a history is only equal to a history of the same length with the
+    same last moves, and it cannot be encoded (nor scored) as a whole:
+
+        >>> history == ['C', 'C'], history == History('DDCC', depth=2), history == History('DDDCC', depth=2)
+        (False, False, True)
+        >>> history.array()
+        Traceback (most recent call last):
+        ...
+        ValueError: Only the last 2 of 5 moves are kept
+        >>> history[1:]
+        Traceback (most recent call last):
+        ...
+        ValueError: Only the last 2 of 5 moves are kept
+    """
+    def __init__(self, moves=(), depth=None):
+        self.depth = depth
+        self._moves = bytearray() if depth is None else bytearray(max(depth, 1))
+        self.reset()
+        self.extend(moves)
+
+    def _position(self, turn):
+        """
+        Where the move of a turn is stored
+        """
+        if self.depth is None:
+            return turn
+        return turn % len(self._moves)
+
+    def _kept(self):
+        """
+        The moves that are kept, in order
+        """
+        if self.depth is None:
+            return self._moves[:self._length]
+        start = max(self._length - len(self._moves), 0)
+        return bytearray(self._moves[self._position(turn)] for turn in range(start, self._length))
+
+    def append(self, move):
+        """
+        Records a move (overwriting the space of a previous match if there is
+        any):
+
+            >>> history = History()
+            >>> history.append('C')
+            >>> history
+            ['C']
+        """
+        index = MOVES.find(move)
+        if len(move) != 1 or index == -1:
+            raise ValueError("A move must be one of 'C' or 'D'")
+        if self._length and self._moves[self._position(self._length - 1)] == index:
+            self._streak += 1
+        else:
+            self._streak = 1
+        if index == 1:
+            self._defections += 1
+            if self._first_defection is None:
+                self._first_defection = self._length
+        position = self._position(self._length)
+        if position < len(self._moves):
+            self._moves[position] = index
+        else:
+            self._moves.append(index)
+        self._length += 1
+
+    def extend(self, moves):
+        """
+        Records a number of moves:
+
+            >>> history = History()
+            >>> history.extend('CDC')
+            >>> history
+            ['C', 'D', 'C']
+        """
+        for move in moves:
+            self.append(move)
+
+    def reset(self):
+        """
+        Empties the history in constant time: the memory is kept to be
+        written over by the next match.
+
+            >>> history = History(['C', 'D'])
+            >>> history.reset()
+            >>> history
+            []
+            >>> len(history)
+            0
+            >>> history.defections(), history.last(), history.streak()
+            (0, None, 0)
+        """
+        self._length = 0
+        self._defections = 0
+        self._first_defection = None
+        self._streak = 0
+
+    def load(self, moves):
+        """
+        Replaces the history with a bytearray of encoded moves (see MOVES):
+
+            >>> history = History()
+            >>> history.load(bytearray([0, 1, 1]))
+            >>> history, history.defections(), history.first_defection(), history.streak()
+            (['C', 'D', 'D'], 2, 1, 2)
+        """
+        moves = bytearray(moves)
+        self._length = len(moves)
+        self._defections = moves.count(b'\x01')
+        first_defection = moves.find(b'\x01')
+        self._first_defection = first_defection if first_defection != -1 else None
+        self._streak = 0
+        if self._length:
+            other = b'\x00' if moves[-1] else b'\x01'
+            self._streak = self._length - 1 - moves.rfind(other)
+        if self.depth is None:
+            self._moves = moves
+        else:
+            for turn in range(max(self._length - len(self._moves), 0), self._length):
+                self._moves[self._position(turn)] = moves[turn]
+
+    def repeat(self, cycle, length, keep=True):
+        """
+        Extends the history of a match that cycles (see Axelrod.play_match)
+        to a length by repeating its moves from the turn cycle on:
+
+            >>> history = History('CDCD')
+            >>> history.repeat(2, 7)
+            >>> history, history.defections(), history.streak()
+            (['C', 'D', 'C', 'D', 'C', 'D', 'C'], 3, 1)
+
+        With keep=False the moves are not all written: the history takes a
+        depth of as many moves as it had (see History) and its counts are
+        calculated from the cycle, so it needs no more memory:
+
+            >>> history = History('CDD')
+            >>> history.repeat(1, 10, keep=False)
+            >>> history, len(history), history.defections(), history.streak(), history.first_defection()
+            (['D', 'D', 'D'], 10, 9, 9, 1)
+            >>> history = History('CCDCD')
+            >>> history.repeat(1, 8, keep=False)
+            >>> history, history.defections(), history.streak()
+            (['C', 'D', 'C', 'D', 'C'], 3, 1)
+        """
+        moves = self._complete()
+        if length <= len(moves):
+            return
+        period = moves[cycle:]
+        repeats, remainder = divmod(length - cycle, len(period))
+        if keep:
+            self.load(moves[:cycle] + period * repeats + period[:remainder])
+            return
+
+        def move(turn):
+            return moves[turn] if turn < cycle else period[(turn - cycle) % len(period)]
+
+        self.depth = len(moves)
+        self._moves = bytearray(len(moves))
+        for turn in range(length - len(moves), length):
+            self._moves[self._position(turn)] = move(turn)
+        self._length = length
+        self._defections = (moves[:cycle].count(b'\x01') + repeats * period.count(b'\x01')
+                            + period[:remainder].count(b'\x01'))
+        first_defection = moves.find(b'\x01')
+        self._first_defection = first_defection if first_defection != -1 else None
+        last = move(length - 1)
+        if period.count(bytearray([last])) == len(period):
+            self._streak = length - 1 - moves[:cycle].rfind(bytearray([1 - last]))
+        else:
+            self._streak = 0
+            while move(length - 1 - self._streak) == last:
+                self._streak += 1
+
+    def cooperations(self):
+        """
+        The number of cooperations (kept as a running count so that
+        strategies do not need to scan the history):
+
+            >>> History(['C', 'D', 'C']).cooperations()
+            2
+        """
+        return self._length - self._defections
 
-            >>> P1 = Defector()
-            >>> P2 = Cooperator()
-            >>> P3 = TitForTat()
-            >>> P4 = Grudger()
-            >>> P5 = GoByMajority()
-            >>> axelrod = Axelrod(P1, P2, P3, P4, P5)
-            >>> axelrod.round_robin(turns=200)
-            >>> for player in sorted(axelrod.players, key=lambda x: x.score):
-            ...     print player, player.score
-            Tit For Tat 2001
-            Grudger 2001
-            Go By Majority 2001
-            Cooperator 2200
-            Defector 2388
+    def defections(self):
+        """
+        The number of defections:
 
-        Now Tit for Tat is top of the pile and in fact the defector is at the bottom.
-        Take a look at the various strategies.
+            >>> History(['C', 'D', 'C']).defections()
+            1
         """
-        for p1, p2 in itertools.combinations(self.players, 2):
-            turn = 0
-            p1.history = []
-            p2.history = []
-            while turn < turns:
-                turn += 1
-                p1.play(p2)
-            scores = self.calculate_scores(p1, p2)
-            p1.score += scores[0]
-            p2.score += scores[1]
+        return self._defections
 
-    def tournament(self, turns=200, repetitions=10):
+    def last(self):
         """
-        Runs repetitions of the round robin (this is mainly to handle stochastic strategies).
+        The last move (None if no move has been played):
 
-        Returns a dictionary containing the scores for every repetition.
+            >>> History(['C', 'D']).last()
+            'D'
+            >>> print History().last()
+            None
+        """
+        if self._length:
+            return MOVES[self._moves[self._position(self._length - 1)]]
+        return None
 
-            >>> random.seed(1)
-            >>> P1 = Defector()
-            >>> P2 = Cooperator()
-            >>> P3 = TitForTat()
-            >>> P4 = Grudger()
-            >>> P5 = GoByMajority()
-            >>> P6 = Random()
-            >>> axelrod = Axelrod(P1, P2, P3, P4, P5, P6)
-            >>> results = axelrod.tournament(turns=200, repetitions=10)
-            >>> type(results)
-            <type 'dict'>
-            >>> for player in sorted(results.keys()):
-            ...     print player, results[player]
-            Grudger [2414, 4788, 7230, 9652, 12108, 14510, 16912, 19316, 21726, 24132]
-            Defector [2784, 5572, 8340, 11104, 13924, 16684, 19468, 22204, 24960, 27720]
-            Go By Majority [2457, 5114, 7583, 10262, 12688, 15135, 17713, 20365, 22898, 25558]
-            Cooperator [2888, 5797, 8724, 11618, 14461, 17400, 20327, 23212, 26103, 29003]
-            Tit For Tat [2584, 5143, 7681, 10223, 12746, 15297, 17849, 20400, 22946, 25505]
-            Random [3456, 6282, 9600, 12370, 15762, 19125, 22192, 24999, 28129, 30918]
-
-        Let us take a look at the min, mean and max of the results:
-            >>> for player in sorted(results.keys()):
-            ...     print player, min(results[player]), sum(results[player]) / float(10), max(results[player])
-            Grudger 2414 13278.8 24132
-            Defector 2784 15276.0 27720
-            Go By Majority 2457 13977.3 25558
-            Cooperator 2888 15953.3 29003
-            Tit For Tat 2584 14037.4 25505
-            Random 3456 17283.3 30918
+    def first_defection(self):
+        """
+        The turn (counting from 0) of the first defection (None if there has
+        not been one):
 
-        We get a similar conclusion to before with Grudger, Defect and Tit for Tat doing very well: in other words we see that cooperation is rewarded.
+            >>> History(['C', 'C', 'D', 'D']).first_defection()
+            2
+            >>> print History(['C', 'C']).first_defection()
+            None
         """
-        dic = {player:[] for player in self.players}
-        for repetition in range(repetitions):
-            self.reset_player_history()
-            self.round_robin(turns=200)
-            for player in self.players:
-                dic[player].append(player.score)
-        return dic
+        return self._first_defection
 
-    def reset_player_history(self):
+    def streak(self):
         """
-        Resets all the player histories
+        The number of times the last move has been played in a row:
 
-            >>> P1 = Defector()
-            >>> P1.history = ['C', 'D']
-            >>> P1.history
-            ['C', 'D']
-            >>> P2 = Cooperator()
-            >>> P2.history = ['D', 'D']
-            >>> P2.history
-            ['D', 'D']
-            >>> axelrod = Axelrod(P1, P2)
-            >>> axelrod.reset_player_history()
-            >>> P1.history
-            []
-            >>> P2.history
-            []
+            >>> History(['C', 'D', 'D', 'D']).streak()
+            3
         """
-        for player in self.players:
-            player.history = []
+        return self._streak
 
-    def calculate_scores(self, p1, p2):
+    def _complete(self):
+        """
+        The moves of the whole history, which must all be kept
         """
-        Calculates the score for two players based their history and on following:
+        if self._length > len(self._moves):
+            raise ValueError('Only the last %s of %s moves are kept' % (len(self._moves), self._length))
+        return self._kept()
 
-        - C vs C both get 2
-        - D vs D both get 4
-        - C vs D => C gets 5 and D gets 0
+    def array(self):
+        """
+        The history as an array of integers (see encode), which must be
+        complete:
 
-            >>> P1 = Player()
-            >>> P1.history = ['C', 'C', 'D']
-            >>> P2 = Player()
-            >>> P2.history = ['C', 'D', 'D']
-            >>> axelrod = Axelrod(P1, P2)
-            >>> axelrod.calculate_scores(P1, P2)
-            (11, 6)
+            >>> History(['C', 'D', 'C']).array()
+            array([0, 1, 0], dtype=int8)
+            >>> History(['C', 'D', 'C'], depth=3).array()
+            array([0, 1, 0], dtype=int8)
+        """
+        return numpy.frombuffer(bytes(self._complete()), dtype=numpy.int8)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return History(MOVES[move] for move in self._complete()[index])
+        if index < 0:
+            index += self._length
+        if not max(self._length - len(self._moves), 0) <= index < self._length:
+            raise IndexError('history index out of range')
+        return MOVES[self._moves[self._position(index)]]
+
+    def __iter__(self):
+        for index in self._kept():
+            yield MOVES[index]
+
+    def __contains__(self, move):
+        if move == 'C':
+            return self.cooperations() > 0
+        if move == 'D':
+            return self._defections > 0
+        return False
+
+    def __eq__(self, other):
+        try:
+            length = len(other)
+        except TypeError:
+            return NotImplemented
+        return len(self) == length and list(self) == list(other)
 
-            >>> P1 = Player()
-            >>> P1.history = ['C', 'C', 'C']
-            >>> P2 = Player()
-            >>> P2.history = ['C', 'C', 'C']
-            >>> axelrod = Axelrod(P1, P2)
-            >>> axelrod.calculate_scores(P1, P2)
-            (6, 6)
+    def __ne__(self, other):
+        return not self == other
 
-            >>> P1 = Player()
-            >>> P1.history = ['D', 'D', 'D']
-            >>> P2 = Player()
-            >>> P2.history = ['D', 'D', 'D']
-            >>> axelrod = Axelrod(P1, P2)
-            >>> axelrod.calculate_scores(P1, P2)
-            (12, 12)
+    def __repr__(self):
+        return repr(list(self))
+
+
+class StateMachine(object):
+    """
+    A deterministic strategy written as a finite state machine: in state s it
+    plays moves[s] (encoded as in MOVES) and then goes to state
+    transitions[m][s] where m is the move played by the opponent. It starts
+    in the initial state. The tables are kept in compact arrays:
+
+        >>> machine = StateMachine(moves=[0, 1], transitions=[[0, 1], [1, 1]])
+        >>> len(machine)
+        2
+        >>> machine.moves
+        array('b', [0, 1])
+        >>> machine.transitions
+        [array('l', [0, 1]), array('l', [1, 1])]
+
+    Its number of states does not depend on the length of a match, so a
+    match between two such machines is bound to cycle (see
+    Axelrod.play_state_machines):
+
+        >>> machine.bounded
+        True
+    """
+    bounded = True
+
+    def __init__(self, moves, transitions, initial=0):
+        self.moves = array.array('b', numpy.asarray(moves, dtype='b').tobytes())
+        self.transitions = [array.array('l', numpy.asarray(row, dtype='l').tobytes())
+                            for row in transitions]
+        self.initial = initial
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def compile_strategy(player):
+    """
+    Compiles a deterministic strategy that declares a bounded state (see
+    Player.match_state) to a StateMachine by exploring every state reachable
+    from the start of a match. Returns None if the state is not declared:
+
+        >>> machine = compile_strategy(Grudger())
+        >>> list(machine.moves), [list(row) for row in machine.transitions]
+        ([0, 1], [[0, 1], [1, 1]])
+        >>> print compile_strategy(GoByMajority())
+        None
+    """
+    if not player.declares('match_state'):
+        return None
+    player, opponent = copy.deepcopy(player), Player()
+    player.reset()
+    state = player.match_state(opponent)
+    if state is None:
+        return None
+    states = {state: 0}
+    pending = [(player, opponent)]
+    moves, transitions = [], ([], [])
+    while len(moves) < len(pending):
+        player, opponent = pending[len(moves)]
+        move = player.strategy(opponent)
+        for reply, row in zip(MOVES, transitions):
+            next_player, next_opponent = copy.deepcopy((player, opponent))
+            next_player.history.append(move)
+            next_opponent.history.append(reply)
+            state = next_player.match_state(next_opponent)
+            if state is None:
+                return None
+            if state not in states:
+                states[state] = len(pending)
+                pending.append((next_player, next_opponent))
+            row.append(states[state])
+        moves.append(MOVES.index(move))
+    return StateMachine(moves, transitions)
+
+
+class _Computed(object):
+    """
+    A table whose entries are computed on demand by a function:
+
+        >>> _Computed(abs)[-2]
+        2
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __getitem__(self, key):
+        return self.function(key)
+
+
+class CountMachine(object):
+    """
+    A state machine (read like a StateMachine) whose state is a mood (the
+    last move played) and the count of the defections minus the
+    cooperations of the opponent. move(mood, count) gives the move played
+    (encoded as in MOVES), which becomes the next mood:
+
+        >>> machine = CountMachine(lambda mood, count: int(count > 0))
+        >>> machine.moves[machine.initial], machine.transitions[1][machine.initial]
+        (0, (0, 1))
+        >>> machine.moves[(0, 1)], machine.transitions[0][(0, 1)]
+        (1, (1, 0))
+
+    The moves and transitions are computed when they are needed, rather
+    than tabulated for every count a match could reach, and as the count
+    keeps changing the machine is not bounded (see StateMachine).
+    """
+    bounded = False
+
+    def __init__(self, move, initial=(0, 0)):
+        def moves(state):
+            return move(*state)
+
+        def cooperated(state):
+            return move(*state), state[1] - 1
+
+        def defected(state):
+            return move(*state), state[1] + 1
+
+        self.moves = _Computed(moves)
+        self.transitions = [_Computed(cooperated), _Computed(defected)]
+        self.initial = initial
+
+
+class BatchHistory(object):
+    """
+    The histories of a player in a number of copies of a match played side
+    by side (see Axelrod.play_batch). The moves are kept (encoded as in
+    MOVES) in a copies by turns array along with running defection counts:
+
+        >>> history = BatchHistory(copies=2, turns=3)
+        >>> history.append(numpy.array([0, 1]))
+        >>> history.append(numpy.array([1, 1]))
+        >>> history.moves
+        array([[0, 1, 0],
+               [1, 1, 0]], dtype=int8)
+        >>> history.turn, history.defections, history.last()
+        (2, array([1, 2]), array([1, 1], dtype=int8))
+
+    Strategies can keep their own arrays (one entry per copy) in memory.
+    """
+    def __init__(self, copies, turns):
+        self.copies = copies
+        self.moves = numpy.zeros((copies, turns), dtype=numpy.int8)
+        self.defections = numpy.zeros(copies, dtype=int)
+        self.turn = 0
+        self.memory = {}
+
+    def append(self, moves):
+        self.moves[:, self.turn] = moves
+        self.defections += moves
+        self.turn += 1
+
+    def cooperations(self):
+        return self.turn - self.defections
+
+    def last(self):
         """
-        s1, s2 = 0, 0
-        for pair in zip(p1.history, p2.history):
-            if pair[0] == pair[1] == 'C':
-                s1 += 2
-                s2 += 2
-            if pair[0] == pair[1] == 'D':
-                s1 += 4
-                s2 += 4
-            if pair[0] == 'C' and pair[1] == 'D':
-                s1 += 5
-                s2 += 0
-            if pair[0] == 'D' and pair[1] == 'C':
-                s1 += 0
-                s2 += 5
-        return s1, s2
+        The last moves of all the copies (None before the first turn).
+
+            >>> print BatchHistory(copies=2, turns=3).last()
+            None
+        """
+        if self.turn:
+            return self.moves[:, self.turn - 1]
+        return None
 
 
-class Player:
+class Player(object):
     """
     A class for a player
+
+    Strategies that make use of randomness must declare themselves as
+    stochastic: the matches between deterministic strategies are only played
+    once in a tournament.
+
+        >>> Player.stochastic
+        False
+
+    The attributes that change during a match (and are restored by
+    Player.reset) are listed in match_attributes: all the others are taken
+    as parameters of the strategy (see Player.signature).
+
+    Strategies that only look at the last few moves (and at the running
+    counts of History) can declare how many in memory_depth, so that long
+    matches need not keep whole histories (see Axelrod.play_match). It is
+    None (unbounded) by default:
+
+        >>> print Player.memory_depth
+        None
+        >>> TitForTat.memory_depth, Grudger.memory_depth
+        (1, 0)
     """
+    stochastic = False
+    match_attributes = ('_history', 'score', '_state_machine')
+    memory_depth = None
+
     def __init__(self):
         """
         Initiates an empty history and 0 score for every player
@@ -267,7 +2981,28 @@ class Player:
         self.history = []
         self.score = 0
 
-    def play(self, opponent):
+    @property
+    def history(self):
+        """
+        The moves played by the player, kept as a History. Any sequence of
+        moves can be given:
+
+            >>> P1 = Player()
+            >>> P1.history = ['C', 'D']
+            >>> P1.history
+            ['C', 'D']
+            >>> type(P1.history)
+            <class 'axelrod.History'>
+            >>> P1.history.defections()
+            1
+        """
+        return self._history
+
+    @history.setter
+    def history(self, moves):
+        self._history = History(moves)
+
+    def play(self, opponent, flips=(0, 0)):
         """
         This pits two players against each other: note that this will raise
         an error if no strategy method is defined (which are defined through
@@ -277,24 +3012,123 @@ class Player:
             >>> P1.play(P2)
             Traceback (most recent call last):
             ...
-            AttributeError: Player instance has no attribute 'strategy'
+            AttributeError: 'Player' object has no attribute 'strategy'
 
         Also note that it does not matter which player plays the other:
 
             >>> P2.play(P1)
             Traceback (most recent call last):
             ...
-            AttributeError: Player instance has no attribute 'strategy'
+            AttributeError: 'Player' object has no attribute 'strategy'
         """
         s1, s2 = self.strategy(opponent), opponent.strategy(self)
+        if flips[0]:
+            s1 = MOVES[1 - MOVES.index(s1)]
+        if flips[1]:
+            s2 = MOVES[1 - MOVES.index(s2)]
         self.history.append(s1)
         opponent.history.append(s2)
 
+    def reset(self):
+        """
+        Gets the player ready for a new match by emptying the history:
+
+            >>> P1 = Player()
+            >>> P1.history = ['C', 'D']
+            >>> P1.reset()
+            >>> P1.history
+            []
+        """
+        self.history.reset()
+
+    def match_state(self, opponent):
+        """
+        Returns everything the strategy depends on during a match as a
+        hashable state, or None if that state is unbounded (which is the
+        default). The move and the next state must only depend on this state
+        and on the moves played so that a match between two deterministic
+        players is a cycle once a pair of states repeats.
+
+            >>> print Player().match_state(Player())
+            None
+        """
+        return None
+
+    def declares(self, name):
+        """
+        Whether the strategy of the player comes with the given declaration
+        (match_state, memory_depth, state_machine or batch_strategy): one
+        only holds for the strategy it was written with, so it must be
+        defined by the class that defines strategy (or by a subclass of it),
+        not inherited by a subclass that changes the strategy. The defaults
+        of Player assume nothing and always hold:
+
+            >>> TitForTat().declares('match_state'), TitForTat().declares('batch_strategy')
+            (True, True)
+            >>> Opener = type('Opener', (TitForTat,), {'strategy': lambda self, opponent: 'D'})
+            >>> [Opener().declares(name) for name in ('match_state', 'memory_depth', 'batch_strategy')]
+            [False, False, False]
+            >>> Opener().declares('state_machine'), Player().declares('batch_strategy')
+            (True, False)
+        """
+        classes = type(self).__mro__
+        owner = next((klass for klass in classes if name in vars(klass)), None)
+        if owner is None or owner is Player:
+            return owner is Player
+        strategist = next((klass for klass in classes if 'strategy' in vars(klass)), None)
+        return strategist is not None and issubclass(owner, strategist)
+
+    def signature(self):
+        """
+        Identifies the strategy of the player by its class and parameters:
+        two deterministic players with the same signature play identically,
+        so the matches between players of the same two signatures are only
+        played once in a tournament (see Axelrod.group_pairs).
+
+            >>> Defector().signature() == Defector().signature()
+            True
+            >>> Grumpy().signature() == Grumpy(grumpy_threshold=10).signature()
+            False
+            >>> Grumpy().signature()
+            ('axelrod.Grumpy', "[('grumpy_threshold', 50), ('nice_threshold', -50), ('starting_state', 'Nice')]")
+
+        The class is named with its module, so strategies of the same name
+        from different modules are told apart:
+
+            >>> Other = type('Defector', (Defector,), {'__module__': 'other'})
+            >>> Other().signature() == Defector().signature()
+            False
+        """
+        parameters = sorted((name, value) for name, value in vars(self).items()
+                            if name not in self.match_attributes)
+        return '%s.%s' % (type(self).__module__, type(self).__name__), repr(parameters)
+
+    def state_machine(self, turns):
+        """
+        Returns the strategy written as a StateMachine for matches of the
+        given number of turns, or None if it cannot be written as one. By
+        default strategies that declare a bounded state (see
+        Player.match_state) are compiled automatically (once per player):
+
+            >>> machine = TitForTat().state_machine(turns=10)
+            >>> list(machine.moves), [list(row) for row in machine.transitions]
+            ([0, 1], [[0, 0], [1, 1]])
+            >>> print Random().state_machine(turns=10)
+            None
+        """
+        if self.stochastic:
+            return None
+        if '_state_machine' not in self.__dict__:
+            self._state_machine = compile_strategy(self)
+        return self._state_machine
+
 
 class Defector(Player):
     """
     A player who only ever defects
     """
+    memory_depth = 0
+
     def strategy(self, opponent):
         """
         Always returns 'D'
@@ -314,6 +3148,24 @@ class Defector(Player):
         """
         return 'D'
 
+    def match_state(self, opponent):
+        """
+        The strategy does not depend on anything:
+
+            >>> Defector().match_state(Player())
+            ()
+        """
+        return ()
+
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Always defects in every copy of the match:
+
+            >>> Defector().batch_strategy(BatchHistory(3, 1), BatchHistory(3, 1), None)
+            array([1, 1, 1], dtype=int8)
+        """
+        return numpy.ones(own.copies, dtype=numpy.int8)
+
     def __repr__(self):
         """
 i       The string method for the strategy:
@@ -328,6 +3180,8 @@ class Cooperator(Player):
     """
     A player who only ever cooperates
     """
+    memory_depth = 0
+
     def strategy(self, opponent):
         """
         Always returns 'C'
@@ -347,6 +3201,24 @@ class Cooperator(Player):
         """
         return 'C'
 
+    def match_state(self, opponent):
+        """
+        The strategy does not depend on anything:
+
+            >>> Cooperator().match_state(Player())
+            ()
+        """
+        return ()
+
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Always cooperates in every copy of the match:
+
+            >>> Cooperator().batch_strategy(BatchHistory(3, 1), BatchHistory(3, 1), None)
+            array([0, 0, 0], dtype=int8)
+        """
+        return numpy.zeros(own.copies, dtype=numpy.int8)
+
     def __repr__(self):
         """
 i       The string method for the strategy:
@@ -360,7 +3232,13 @@ i       The string method for the strategy:
 class Random(Player):
     """
     A player who randomly chooses between cooperating and defecting
+
+        >>> Random.stochastic
+        True
     """
+    stochastic = True
+    memory_depth = 0
+
     def strategy(self, opponent):
         """
         Always returns 'C'
@@ -392,6 +3270,16 @@ class Random(Player):
         """
         return random.choice(['C','D'])
 
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Randomly chooses in every copy of the match:
+
+            >>> random_state = numpy.random.RandomState(1)
+            >>> Random().batch_strategy(BatchHistory(4, 1), BatchHistory(4, 1), random_state)
+            array([1, 1, 0, 0], dtype=int8)
+        """
+        return random_state.randint(2, size=own.copies).astype(numpy.int8)
+
     def __repr__(self):
         """
 i       The string method for the strategy:
@@ -406,6 +3294,8 @@ class TitForTat(Player):
     """
     A player starts by cooperating and then mimics previous move by opponent.
     """
+    memory_depth = 1
+
     def strategy(self, opponent):
         """
         Begins by playing 'C':
@@ -429,10 +3319,38 @@ class TitForTat(Player):
             'C'
         >>>
         """
-        try:
-            return opponent.history[-1]
-        except IndexError:
-            return 'C'
+        if opponent.history.last() == 'D':
+            return 'D'
+        return 'C'
+
+    def match_state(self, opponent):
+        """
+        The strategy only depends on whether the last move of the opponent
+        was a defection:
+
+            >>> P2 = Player()
+            >>> P2.history = ['C', 'D']
+            >>> TitForTat().match_state(P2)
+            True
+        """
+        return opponent.history.last() == 'D'
+
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Cooperates and then plays the last move of the opponent in every copy:
+
+            >>> P1 = TitForTat()
+            >>> own, opponent = BatchHistory(2, 2), BatchHistory(2, 2)
+            >>> P1.batch_strategy(own, opponent, None)
+            array([0, 0], dtype=int8)
+            >>> opponent.append(numpy.array([0, 1]))
+            >>> P1.batch_strategy(own, opponent, None)
+            array([0, 1], dtype=int8)
+        """
+        last = opponent.last()
+        if last is None:
+            return numpy.zeros(own.copies, dtype=numpy.int8)
+        return last.copy()
 
     def __repr__(self):
         """
@@ -448,6 +3366,8 @@ class Grudger(Player):
     """
     A player starts by cooperating however will defect if at any point the opponent has defected
     """
+    memory_depth = 0
+
     def strategy(self, opponent):
         """
         Begins by playing 'C':
@@ -472,10 +3392,33 @@ class Grudger(Player):
             'D'
         >>>
         """
-        if 'D' in opponent.history:
+        if opponent.history.defections():
             return 'D'
         return 'C'
 
+    def match_state(self, opponent):
+        """
+        The strategy only depends on whether the opponent has ever defected:
+
+            >>> P2 = Player()
+            >>> P2.history = ['C', 'D', 'C']
+            >>> Grudger().match_state(P2)
+            True
+        """
+        return opponent.history.defections() > 0
+
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Defects in the copies where the opponent has ever defected:
+
+            >>> own, opponent = BatchHistory(2, 2), BatchHistory(2, 2)
+            >>> opponent.append(numpy.array([0, 1]))
+            >>> opponent.append(numpy.array([0, 0]))
+            >>> Grudger().batch_strategy(own, opponent, None)
+            array([0, 1], dtype=int8)
+        """
+        return (opponent.defections > 0).astype(numpy.int8)
+
     def __repr__(self):
         """
 i       The string method for the strategy:
@@ -490,6 +3433,8 @@ class GoByMajority(Player):
     """
     A player examines the history of the opponent: if the opponent has more defections than cooperations then the player defects
     """
+    memory_depth = 0
+
     def strategy(self, opponent):
         """
         Begins by playing 'C':
@@ -521,10 +3466,34 @@ class GoByMajority(Player):
             'D'
         >>>
         """
-        if sum([s == 'D' for s in opponent.history]) > sum([s == 'C' for s in opponent.history]):
+        if opponent.history.defections() > opponent.history.cooperations():
             return 'D'
         return 'C'
 
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Defects in the copies where the opponent has defected more than
+        cooperated:
+
+            >>> own, opponent = BatchHistory(2, 2), BatchHistory(2, 2)
+            >>> opponent.append(numpy.array([1, 1]))
+            >>> opponent.append(numpy.array([0, 1]))
+            >>> GoByMajority().batch_strategy(own, opponent, None)
+            array([0, 1], dtype=int8)
+        """
+        return (opponent.defections > opponent.cooperations()).astype(numpy.int8)
+
+    def state_machine(self, turns):
+        """
+        Counts the difference between the defections and cooperations of the
+        opponent:
+
+            >>> machine = GoByMajority().state_machine(turns=2)
+            >>> [machine.moves[(0, count)] for count in range(-2, 3)]
+            [0, 0, 0, 1, 1]
+        """
+        return CountMachine(lambda mood, count: int(count > 0))
+
     def __repr__(self):
         """
 i       The string method for the strategy:
@@ -539,6 +3508,8 @@ class Grumpy(Player):
     """
     A player that defects after a ceratin level of grumpiness. Grumpiness increases when the opponent defects and decreases when the opponent co-operates.
     """
+    match_attributes = Player.match_attributes + ('state', 'grumpiness')
+    memory_depth = 0
     
     def __init__(self, starting_state = 'Nice', grumpy_threshold = 50, nice_threshold = -50):
         """
@@ -571,10 +3542,24 @@ class Grumpy(Player):
 
         self.history = []
         self.score = 0
+        self.starting_state = starting_state
         self.state = starting_state
         self.grumpy_threshold = grumpy_threshold
         self.nice_threshold = nice_threshold
 
+    def reset(self):
+        """
+        Empties the history and goes back to the starting state:
+
+            >>> P1 = Grumpy()
+            >>> P1.state = 'Grumpy'
+            >>> P1.reset()
+            >>> P1.state
+            'Nice'
+        """
+        Player.reset(self)
+        self.state = self.starting_state
+
     def strategy(self, opponent):
         """
 
@@ -605,7 +3590,7 @@ class Grumpy(Player):
             'C'
         """
 
-        self.grumpiness = sum(play=='D' for play in opponent.history) - sum(play=='C' for play in opponent.history) 
+        self.grumpiness = opponent.history.defections() - opponent.history.cooperations()
 
         if self.state == 'Nice':
             if self.grumpiness > self.grumpy_threshold:
@@ -619,6 +3604,49 @@ class Grumpy(Player):
                 return 'C'
             return 'D'
 
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Keeps the state of every copy (True when grumpy) in memory:
+
+            >>> P1 = Grumpy('Nice', 1, 0)
+            >>> own, opponent = BatchHistory(2, 5), BatchHistory(2, 5)
+            >>> opponent.append(numpy.array([1, 1]))
+            >>> opponent.append(numpy.array([0, 1]))
+            >>> P1.batch_strategy(own, opponent, None)
+            array([0, 1], dtype=int8)
+            >>> for turn in range(3):
+            ...     opponent.append(numpy.array([0, 0]))
+            >>> P1.batch_strategy(own, opponent, None)
+            array([0, 0], dtype=int8)
+        """
+        if 'grumpy' not in own.memory:
+            own.memory['grumpy'] = numpy.repeat(self.starting_state == 'Grumpy', own.copies)
+        grumpy = own.memory['grumpy']
+        grumpiness = opponent.defections - opponent.cooperations()
+        nice = grumpy & (grumpiness < self.nice_threshold)
+        grumpy[~grumpy & (grumpiness > self.grumpy_threshold)] = True
+        grumpy[nice] = False
+        return grumpy.astype(numpy.int8)
+
+    def state_machine(self, turns):
+        """
+        Counts the grumpiness (for both states: nice and grumpy):
+
+            >>> machine = Grumpy('Nice', 1, -1).state_machine(turns=2)
+            >>> [machine.moves[(mood, count)] for mood in (0, 1) for count in range(-2, 3)]
+            [0, 0, 0, 0, 1, 0, 1, 1, 1, 1]
+            >>> machine.initial
+            (0, 0)
+        """
+        grumpy_threshold, nice_threshold = self.grumpy_threshold, self.nice_threshold
+
+        def move(grumpy, grumpiness):
+            if grumpy:
+                return int(grumpiness >= nice_threshold)
+            return int(grumpiness > grumpy_threshold)
+
+        return CountMachine(move, initial=(int(self.starting_state == 'Grumpy'), 0))
+
     def __repr__(self):
         """
         The string method for the strategy:
@@ -630,6 +3658,109 @@ class Grumpy(Player):
 
         return 'Grumpy'
 
+class MemoryOne(Player):
+    """
+    A player whose probability of cooperating only depends on the last turn:
+    probabilities gives it after CC, CD, DC and DD (its own move first) and
+    initial gives it for the first turn. The expected payoffs of two of these
+    players can be calculated exactly (see Axelrod.expected_payoffs).
+
+        >>> P1 = MemoryOne((1, 0, 1, 0))
+        >>> P1.probabilities, P1.initial
+        ((1, 0, 1, 0), 1)
+
+    A memory one player is only stochastic if one of its probabilities is
+    neither 0 nor 1:
+
+        >>> P1.stochastic, MemoryOne((0.9, 0, 1, 0)).stochastic
+        (False, True)
+    """
+    memory_depth = 1
+
+    def __init__(self, probabilities, initial=1):
+        Player.__init__(self)
+        self.probabilities = tuple(probabilities)
+        self.initial = initial
+        self.stochastic = any(p not in (0, 1) for p in self.probabilities + (initial,))
+
+    def strategy(self, opponent):
+        """
+        Plays the first move and then the ones given by the last turn:
+
+            >>> P1 = MemoryOne((1, 0, 1, 0), initial=0)
+            >>> P2 = Player()
+            >>> P1.strategy(P2)
+            'D'
+            >>> P1.history = ['D']
+            >>> P2.history = ['C']
+            >>> P1.strategy(P2)
+            'C'
+            >>> MemoryOne((1.0, 0, 1, 0)).strategy(P2)
+            'C'
+
+        Random moves use the random module:
+
+            >>> random.seed(1)
+            >>> P1 = MemoryOne((0.5, 0.5, 0.5, 0.5))
+            >>> P1.history = ['C']
+            >>> P2.history = ['C']
+            >>> [P1.strategy(P2) for turn in range(4)]
+            ['C', 'D', 'D', 'C']
+        """
+        if not self.history:
+            probability = self.initial
+        else:
+            probability = self.probabilities[2 * MOVES.index(self.history.last())
+                                             + MOVES.index(opponent.history.last())]
+        if probability in (0, 1):
+            return MOVES[1 - int(probability)]
+        if random.random() < probability:
+            return 'C'
+        return 'D'
+
+    def match_state(self, opponent):
+        """
+        A deterministic memory one player only depends on the last turn:
+
+            >>> P1, P2 = MemoryOne((1, 0, 1, 0)), Player()
+            >>> P1.history, P2.history = ['C', 'D'], ['C', 'C']
+            >>> P1.match_state(P2)
+            ('D', 'C')
+            >>> print MemoryOne((0.5, 0, 1, 0)).match_state(P2)
+            None
+        """
+        if self.stochastic:
+            return None
+        return self.history.last(), opponent.history.last()
+
+    def batch_strategy(self, own, opponent, random_state):
+        """
+        Draws the moves of all the copies at once:
+
+            >>> P1 = MemoryOne((1, 0, 1, 0), initial=0)
+            >>> own, opponent = BatchHistory(2, 2), BatchHistory(2, 2)
+            >>> P1.batch_strategy(own, opponent, numpy.random.RandomState(1))
+            array([1, 1], dtype=int8)
+            >>> own.append(numpy.array([1, 1]))
+            >>> opponent.append(numpy.array([0, 1]))
+            >>> P1.batch_strategy(own, opponent, numpy.random.RandomState(1))
+            array([0, 1], dtype=int8)
+        """
+        if own.last() is None:
+            probabilities = numpy.repeat(float(self.initial), own.copies)
+        else:
+            probabilities = numpy.array(self.probabilities, dtype=float)[2 * own.last() + opponent.last()]
+        return (random_state.random_sample(own.copies) >= probabilities).astype(numpy.int8)
+
+    def __repr__(self):
+        """
+        The string method for the strategy:
+
+            >>> print MemoryOne((1, 0, 1, 0))
+            Memory One
+        """
+        return 'Memory One'
+
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
     P1 = Defector()
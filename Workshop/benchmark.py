@@ -0,0 +1,244 @@
+"""
+Benchmarks of the hot paths of axelrod.py
+
+Runs a set of standard scenarios (long matches between every pair of
+strategies, round robins of a growing number of players and tournaments with
+many repetitions), each in its own process so that its peak memory can be
+measured, and reports the turns per second, matches per second and peak
+memory of each:
+
+    $ python benchmark.py --save baseline.json
+    $ python benchmark.py --baseline baseline.json
+
+The second run flags (and exits with a non zero status for) every scenario
+that is slower or uses more memory than the saved baseline by more than the
+tolerance.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import resource
+import sys
+import time
+import traceback
+
+import axelrod
+
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+STRATEGIES = [axelrod.Defector, axelrod.Cooperator, axelrod.TitForTat, axelrod.Grudger,
+              axelrod.GoByMajority, axelrod.Grumpy, axelrod.Random]
+PLAYERS = (5, 10, 20, 50, 100, 200)
+REPETITIONS = (10, 100, 1000)
+
+
+def players(number):
+    """
+    Returns a number of players cycling through the strategies:
+
+        >>> players(9)
+        [Defector, Cooperator, Tit For Tat, Grudger, Go By Majority, Grumpy, Random, Defector, Cooperator]
+    """
+    return [STRATEGIES[index % len(STRATEGIES)]() for index in range(number)]
+
+
+def scenarios(scale=1):
+    """
+    Returns the scenarios of the benchmark as tuples of a name, a function
+    running it, and the number of matches and turns it plays. The scale
+    multiplies the number of turns (and of repetitions) of every scenario:
+
+        >>> names = [scenario[0] for scenario in scenarios()]
+        >>> len(names)
+        37
+        >>> names[:2]
+        ['match/Defector-Defector', 'match/Defector-Cooperator']
+        >>> names[28:]
+        ['round_robin/5', 'round_robin/10', 'round_robin/20', 'round_robin/50', 'round_robin/100', 'round_robin/200', 'tournament/10', 'tournament/100', 'tournament/1000']
+        >>> name, function, matches, turns = scenarios(scale=0.01)[-1]
+        >>> name, matches, turns
+        ('tournament/1000', 210, 420)
+    """
+    turns = max(1, int(10000 * scale))
+    rounds = max(1, int(200 * scale))
+    found = []
+    for s1, s2 in itertools.combinations_with_replacement(STRATEGIES, 2):
+        name = 'match/%s-%s' % (s1.__name__, s2.__name__)
+        found.append((name, _match(s1, s2, turns), 1, turns))
+    for number in PLAYERS:
+        matches = number * (number - 1) // 2
+        found.append(('round_robin/%s' % number, _round_robin(number, rounds), matches, matches * rounds))
+    for number in REPETITIONS:
+        repetitions = max(1, int(number * scale))
+        matches = len(STRATEGIES) * (len(STRATEGIES) - 1) // 2 * repetitions
+        found.append(('tournament/%s' % number, _tournament(repetitions, rounds), matches, matches * rounds))
+    return found
+
+
+class _match(object):
+    """
+    Plays a single match (a class rather than a closure so that it can be
+    sent to another process)
+    """
+    def __init__(self, s1, s2, turns):
+        self.s1, self.s2, self.turns = s1, s2, turns
+
+    def __call__(self):
+        axelrod.Axelrod().play_match(self.s1(), self.s2(), self.turns, seed=0)
+
+
+class _round_robin(object):
+    """
+    Plays a round robin between a number of players
+    """
+    def __init__(self, number, turns):
+        self.number, self.turns = number, turns
+
+    def __call__(self):
+        axelrod.random.seed(0)
+        axelrod.Axelrod(*players(self.number)).round_robin(turns=self.turns)
+
+
+class _tournament(object):
+    """
+    Plays a tournament between one player of every strategy
+    """
+    def __init__(self, repetitions, turns):
+        self.repetitions, self.turns = repetitions, turns
+
+    def __call__(self):
+        axelrod.Axelrod(*players(len(STRATEGIES))).tournament(turns=self.turns, repetitions=self.repetitions,
+                                                              seed=0)
+
+
+class _fail(object):
+    """
+    Raises an error (to check that it reaches the parent process)
+    """
+    def __call__(self):
+        raise ValueError('A failing scenario')
+
+
+def _measure(function, queue):
+    """
+    Times a function and sends the time along with the peak memory of the
+    process (in kilobytes) through the queue, or the traceback of the error
+    raised by the function
+    """
+    try:
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+    except Exception:
+        queue.put((None, traceback.format_exc()))
+        return
+    queue.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run(scenario):
+    """
+    Runs a scenario in a new process and returns its measures:
+
+        >>> name, function, matches, turns = scenarios(scale=0.01)[0]
+        >>> measures = run((name, function, matches, turns))
+        >>> sorted(measures)
+        ['matches_per_second', 'memory', 'seconds', 'turns_per_second']
+
+    An error raised by the scenario is raised again with its traceback, and
+    a process that dies without a result is reported:
+
+        >>> run(('fail', _fail(), 1, 1))  # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+        ...
+        RuntimeError: The scenario fail failed:
+        Traceback (most recent call last):
+        ...
+        ValueError: A failing scenario
+        <BLANKLINE>
+    """
+    name, function, matches, turns = scenario
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(function, queue))
+    process.start()
+    while True:
+        try:
+            elapsed, memory = queue.get(timeout=1)
+            break
+        except Empty:
+            if not process.is_alive():
+                raise RuntimeError('The scenario %s exited with code %s and no result' % (name, process.exitcode))
+    process.join()
+    if elapsed is None:
+        raise RuntimeError('The scenario %s failed:\n%s' % (name, memory))
+    elapsed = max(elapsed, 1e-9)
+    return {'seconds': elapsed, 'matches_per_second': matches / elapsed,
+            'turns_per_second': turns / elapsed, 'memory': memory}
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compares measures with a baseline and returns the regressions: the
+    scenarios with fewer turns per second or more memory than the baseline
+    (by more than the tolerance):
+
+        >>> baseline = {'match/A-B': {'turns_per_second': 1000, 'memory': 100},
+        ...             'match/A-C': {'turns_per_second': 1000, 'memory': 100}}
+        >>> results = {'match/A-B': {'turns_per_second': 950, 'memory': 130},
+        ...            'match/A-C': {'turns_per_second': 800, 'memory': 100},
+        ...            'match/B-C': {'turns_per_second': 10, 'memory': 100}}
+        >>> compare(results, baseline)
+        [('match/A-B', 'memory', 100, 130), ('match/A-C', 'turns_per_second', 1000, 800)]
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old, new = baseline[name], results[name]
+        if new['turns_per_second'] < old['turns_per_second'] * (1 - tolerance):
+            regressions.append((name, 'turns_per_second', old['turns_per_second'], new['turns_per_second']))
+        if new['memory'] > old['memory'] * (1 + tolerance):
+            regressions.append((name, 'memory', old['memory'], new['memory']))
+    return regressions
+
+
+def main(arguments=None):
+    """
+    Runs the benchmark from the command line and returns its exit status
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1, help='multiplies the turns and repetitions')
+    parser.add_argument('--select', default='', help='only runs the scenarios starting with this')
+    parser.add_argument('--save', help='saves the measures to this file')
+    parser.add_argument('--baseline', help='compares the measures with this file')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='the allowed relative regression')
+    arguments = parser.parse_args(arguments)
+
+    results = {}
+    print('%-40s %10s %14s %14s %12s' % ('scenario', 'seconds', 'turns/s', 'matches/s', 'memory (kB)'))
+    for scenario in scenarios(arguments.scale):
+        if not scenario[0].startswith(arguments.select):
+            continue
+        measures = results[scenario[0]] = run(scenario)
+        print('%-40s %10.3f %14.0f %14.1f %12d' % (scenario[0], measures['seconds'],
+                                                   measures['turns_per_second'],
+                                                   measures['matches_per_second'], measures['memory']))
+        sys.stdout.flush()
+
+    if arguments.save:
+        with open(arguments.save, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if arguments.baseline:
+        with open(arguments.baseline) as f:
+            regressions = compare(results, json.load(f), arguments.tolerance)
+        for name, measure, old, new in regressions:
+            print('Regression in %s: %s went from %s to %s' % (name, measure, old, new))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())